@@ -1,13 +1,15 @@
 """
 FastAPI主应用 - 智能生产线监控系统后端
 """
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Depends, HTTPException, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 import time
+import base64
+import json
 
 from .database import (
     get_db, init_db, DetectionRecord, SensorData, ProductionStatus, AlertRecord,
@@ -18,7 +20,7 @@ from .database import (
 )
 from .schemas import (
     DetectionReport, DetectionResponse,
-    SensorReport, SensorResponse,
+    SensorReport, SensorBatchReport, SensorResponse,
     ProductionStatusUpdate, ProductionStatusResponse,
     ControlCommand, ControlResponse,
     AlertCreate, AlertResponse,
@@ -432,6 +434,12 @@ async def report_sensor(report: SensorReport, db: Session = Depends(get_db)):
     db.commit()
     db.refresh(record)
     
+    await _process_sensor_reading(report, db)
+    return record
+
+
+async def _process_sensor_reading(report: SensorReport, db: Session):
+    """传感器读数入库后的处理：推送前端、阈值报警、调度规则"""
     # 广播到前端
     await manager.broadcast_sensor_update(
         report.device_id, report.sensor_type, report.value, report.unit
@@ -494,8 +502,23 @@ async def report_sensor(report: SensorReport, db: Session = Depends(get_db)):
         
         # 检查压力调度规则
         await scheduler.check_pressure(report.device_id, report.value)
+
+
+@app.post("/api/sensor/batch", response_model=List[SensorResponse], tags=["传感器数据"])
+async def report_sensor_batch(batch: SensorBatchReport, db: Session = Depends(get_db)):
+    """批量上报传感器数据（所有读数一次事务入库，之后每条读数的处理与单条上报一致）"""
+    reports = [SensorReport(device_id=batch.device_id, **reading.model_dump())
+               for reading in batch.readings]
+    records = [SensorData(device_id=r.device_id, sensor_type=r.sensor_type,
+                          value=r.value, unit=r.unit) for r in reports]
+    db.add_all(records)
+    db.commit()
+    for record in records:
+        db.refresh(record)
     
-    return record
+    for report in reports:
+        await _process_sensor_reading(report, db)
+    return records
 
 
 @app.get("/api/sensor/latest", tags=["传感器数据"])
@@ -543,9 +566,16 @@ async def get_sensor_history(
 
 
 # ---------- 生产状态API ----------
+def _status_etag(status: ProductionStatus) -> str:
+    """生产状态的 ETag（任一字段变化都会改变）"""
+    updated = status.updated_at.timestamp() if status.updated_at else 0
+    return f'W/"{status.status}-{status.mode}-{status.production_count}-{updated}"'
+
+
 @app.get("/api/status/{device_id}", response_model=ProductionStatusResponse, tags=["生产状态"])
-async def get_production_status(device_id: str, db: Session = Depends(get_db)):
-    """获取生产状态"""
+async def get_production_status(device_id: str, request: Request, response: Response,
+                                db: Session = Depends(get_db)):
+    """获取生产状态（支持 If-None-Match，状态未变化时返回 304）"""
     status = db.query(ProductionStatus).filter(
         ProductionStatus.device_id == device_id
     ).first()
@@ -562,6 +592,10 @@ async def get_production_status(device_id: str, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(status)
     
+    etag = _status_etag(status)
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
     return status
 
 
@@ -795,6 +829,33 @@ async def receive_video_frame(data: dict):
     if not frame_base64:
         raise HTTPException(status_code=400, detail="缺少视频帧数据")
     
+    return await publish_video_frame(device_id, frame_base64, detection, timestamp)
+
+
+@app.post("/api/video/frame/upload", tags=["视频流"])
+async def upload_video_frame(
+    frame: UploadFile = File(...),
+    device_id: str = Form("device_001"),
+    timestamp: Optional[str] = Form(None),
+    detection: Optional[str] = Form(None)
+):
+    """
+    接收multipart上传的原始JPEG视频帧
+    
+    设备端不再做base64编码，传输体积减少约33%
+    """
+    frame_bytes = await frame.read()
+    if not frame_bytes:
+        raise HTTPException(status_code=400, detail="缺少视频帧数据")
+    
+    frame_base64 = base64.b64encode(frame_bytes).decode('utf-8')
+    detection_info = json.loads(detection) if detection else {}
+    
+    return await publish_video_frame(device_id, frame_base64, detection_info, timestamp)
+
+
+async def publish_video_frame(device_id: str, frame_base64: str, detection: dict, timestamp: str):
+    """缓存最新帧并广播到前端"""
     # 存储最新帧
     latest_video_frames[device_id] = {
         "frame": frame_base64,
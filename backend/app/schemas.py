@@ -37,6 +37,19 @@ class SensorReport(BaseModel):
     unit: str = ""
 
 
+class SensorReading(BaseModel):
+    """单条传感器读数（批量上报用）"""
+    sensor_type: str  # temperature/pressure/humidity
+    value: float
+    unit: str = ""
+
+
+class SensorBatchReport(BaseModel):
+    """传感器批量上报数据（一次请求上报多种传感器）"""
+    device_id: str
+    readings: List[SensorReading]
+
+
 class SensorResponse(BaseModel):
     id: int
     device_id: str
@@ -11,7 +11,7 @@
 """
 import requests
 import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import threading
 
 
@@ -88,6 +88,23 @@ class DeviceClient:
         
         return self._post("/api/sensor", data)
     
+    def report_sensor_batch(self, readings: List[Dict[str, Any]]) -> bool:
+        """
+        批量上报传感器数据（一次请求上报多种传感器）
+        
+        Args:
+            readings: [{"sensor_type": str, "value": float, "unit": str}, ...]
+        
+        Returns:
+            是否上报成功
+        """
+        data = {
+            "device_id": self.device_id,
+            "readings": readings
+        }
+        
+        return self._post("/api/sensor/batch", data)
+    
     def report_temperature(self, value: float) -> bool:
         """上报温度"""
         return self.report_sensor("temperature", value, "°C")
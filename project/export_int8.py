@@ -0,0 +1,152 @@
+"""
+YOLOv8n INT8 量化导出工具（NCNN）
+功能：
+1. 从部署现场的摄像头采集校准图片（光照/视角与实际运行一致）
+2. 导出 320x320 输入的 FP32 NCNN 中间模型（yolov8n_ncnn_320_model，不覆盖仓库中的 yolov8n_ncnn_model）
+3. 使用 NCNN 自带的 ncnn2table / ncnn2int8 工具做 INT8 训练后量化
+4. 生成 yolov8n_ncnn_int8_model 目录，unified_detection.py 启动时自动优先使用
+
+说明：
+- 树莓派5（Cortex-A76）支持 SDOT/UDOT 整数点积指令，INT8 推理明显更快
+- 不支持点积指令的 CPU 会自动回退到 FP32 NCNN 模型
+- 需要 ncnn 工具链（ncnnoptimize / ncnn2table / ncnn2int8）在 PATH 中
+
+使用方法:
+    python export_int8.py                # 采集200帧并量化
+    python export_int8.py --frames 300   # 指定采集帧数
+    python export_int8.py --skip-capture # 复用已有校准图片
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import cv2
+from ultralytics import YOLO
+
+PT_MODEL = "yolov8n.pt"
+IMGSZ = 320                               # 与 ZoneDetector 的 input_size 保持一致
+FP32_MODEL_DIR = "yolov8n_ncnn_320_model"   # 量化用的中间模型，不提交到仓库
+INT8_MODEL_DIR = "yolov8n_ncnn_int8_model"
+CALIB_DIR = "calib_images"
+CAMERA_WIDTH = 480
+CAMERA_HEIGHT = 360
+
+
+def capture_calibration_frames(num_frames: int, interval: float = 0.2):
+    """从摄像头采集校准图片"""
+    os.makedirs(CALIB_DIR, exist_ok=True)
+
+    picam2 = None
+    cap = None
+    try:
+        from picamera2 import Picamera2
+        picam2 = Picamera2()
+        config = picam2.create_preview_configuration(
+            main={"size": (CAMERA_WIDTH, CAMERA_HEIGHT), "format": "RGB888"}  # 内存顺序为 BGR
+        )
+        picam2.configure(config)
+        picam2.start()
+        print("✓ 使用 picamera2 采集校准图片")
+    except Exception:
+        picam2 = None
+        cap = cv2.VideoCapture(0)
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
+        if not cap.isOpened():
+            raise RuntimeError("无法打开摄像头")
+        print("✓ 使用 OpenCV 采集校准图片")
+
+    try:
+        for i in range(num_frames):
+            if picam2:
+                frame = picam2.capture_array()
+            else:
+                ret, frame = cap.read()
+                if not ret:
+                    raise RuntimeError("无法读取帧")
+            cv2.imwrite(os.path.join(CALIB_DIR, f"calib_{i:04d}.jpg"), frame)
+            print(f"\r⏳ 采集校准图片: {i + 1}/{num_frames}", end="")
+            time.sleep(interval)
+        print()
+    finally:
+        if picam2:
+            picam2.stop()
+        if cap:
+            cap.release()
+
+
+def export_fp32_ncnn():
+    """
+    导出 FP32 NCNN 模型（输入尺寸与运行时一致）
+    Ultralytics 总是导出到 .pt 同目录的 yolov8n_ncnn_model，会覆盖仓库中的模型，
+    因此先在临时目录中导出，再移动到 FP32_MODEL_DIR
+    """
+    print(f"⏳ 导出 FP32 NCNN 模型 (imgsz={IMGSZ})...")
+    with tempfile.TemporaryDirectory() as tmp:
+        pt_copy = shutil.copy(PT_MODEL, tmp)
+        exported = YOLO(pt_copy).export(format="ncnn", imgsz=IMGSZ)
+        if os.path.isdir(FP32_MODEL_DIR):
+            shutil.rmtree(FP32_MODEL_DIR)
+        shutil.move(str(exported), FP32_MODEL_DIR)
+
+
+def quantize_int8():
+    """使用 NCNN 工具链做 INT8 量化"""
+    images = sorted(os.path.join(os.path.abspath(CALIB_DIR), f)
+                    for f in os.listdir(CALIB_DIR) if f.endswith(".jpg"))
+    if not images:
+        raise RuntimeError(f"{CALIB_DIR} 中没有校准图片")
+
+    os.makedirs(INT8_MODEL_DIR, exist_ok=True)
+    work = lambda name: os.path.join(INT8_MODEL_DIR, name)
+
+    with open(work("imagelist.txt"), "w") as f:
+        f.write("\n".join(images))
+
+    # 1. 图优化（融合 BN 等，量化前必须执行）
+    subprocess.run(["ncnnoptimize",
+                    os.path.join(FP32_MODEL_DIR, "model.ncnn.param"),
+                    os.path.join(FP32_MODEL_DIR, "model.ncnn.bin"),
+                    work("model-opt.param"), work("model-opt.bin"), "0"], check=True)
+
+    # 2. 生成量化表（KL散度校准，归一化与 Ultralytics 预处理一致：RGB / 255）
+    subprocess.run(["ncnn2table",
+                    work("model-opt.param"), work("model-opt.bin"),
+                    work("imagelist.txt"), work("model.table"),
+                    "mean=[0,0,0]",
+                    "norm=[0.003922,0.003922,0.003922]",
+                    f"shape=[{IMGSZ},{IMGSZ},3]",
+                    "pixel=RGB",
+                    "thread=4",
+                    "method=kl"], check=True)
+
+    # 3. 生成 INT8 模型，文件名与 Ultralytics NCNN 目录格式一致
+    subprocess.run(["ncnn2int8",
+                    work("model-opt.param"), work("model-opt.bin"),
+                    work("model.ncnn.param"), work("model.ncnn.bin"),
+                    work("model.table")], check=True)
+
+    shutil.copy(os.path.join(FP32_MODEL_DIR, "metadata.yaml"), work("metadata.yaml"))
+
+    for name in ("model-opt.param", "model-opt.bin", "imagelist.txt"):
+        os.remove(work(name))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="YOLOv8n INT8 量化导出")
+    parser.add_argument("--frames", type=int, default=200, help="校准图片数量")
+    parser.add_argument("--skip-capture", action="store_true", help="复用已有校准图片")
+    args = parser.parse_args()
+
+    if not args.skip_capture:
+        capture_calibration_frames(args.frames)
+
+    export_fp32_ncnn()
+    quantize_int8()
+
+    print(f"✓ INT8 模型导出完成: {INT8_MODEL_DIR}")
+    print("  下次启动 unified_detection.py 将自动使用 INT8 模型")
@@ -426,6 +426,8 @@ def run_product_detection(camera_id: int = 0,
     
     last_stream_time = 0
     stream_interval = 1.0 / VIDEO_STREAM_FPS
+    frame_interval = 1.0 / 30           # 无界面模式按摄像头帧率节拍运行
+    deadline = time.monotonic()
     
     try:
         while True:
@@ -476,7 +478,13 @@ def run_product_detection(camera_id: int = 0,
                     detector.detection_count = {"product_a": 0, "product_b": 0, "unknown": 0}
                     print("✓ 计数已重置")
             else:
-                time.sleep(0.01)
+                # 只睡到下一帧的截止时间，处理超时则从当前时间重新计时
+                deadline += frame_interval
+                remaining = deadline - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+                else:
+                    deadline = time.monotonic()
                 
     except KeyboardInterrupt:
         print("\n\n收到中断信号，正在退出...")
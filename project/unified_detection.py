@@ -13,17 +13,22 @@
 import cv2
 import numpy as np
 from ultralytics import YOLO
+from scipy.optimize import linear_sum_assignment
+from scipy.spatial.distance import cdist
 from datetime import datetime
-from dataclasses import dataclass, field
+from dataclasses import dataclass
 from typing import List, Tuple, Callable, Optional, Dict, Set
 from enum import Enum
+from collections import deque
 import time
 import threading
 import platform
 import subprocess
-import base64
-import requests
+import json
 import uuid
+import os
+import queue
+import random
 
 # ==================== 系统检测 ====================
 IS_WINDOWS = platform.system() == "Windows"
@@ -36,22 +41,78 @@ if IS_WINDOWS:
 PICAMERA2_AVAILABLE = False
 if IS_LINUX:
     try:
-        from picamera2 import Picamera2
+        from picamera2 import Picamera2, MappedArray
         PICAMERA2_AVAILABLE = True
         print("✓ picamera2 可用")
     except ImportError:
         print("⚠️ picamera2 不可用，将尝试其他方式打开摄像头")
 
-# 尝试导入 DHT11 温湿度传感器
-DHT_AVAILABLE = False
-if IS_LINUX:
+# 尝试导入 ncnn（直接调用NCNN推理，跳过Ultralytics的Python前后处理）
+NCNN_AVAILABLE = False
+try:
+    import ncnn
+    NCNN_AVAILABLE = True
+    print("✓ ncnn 可用")
+except ImportError:
+    print("⚠️ ncnn 不可用，将使用 Ultralytics 推理")
+
+# 尝试导入 TurboJPEG（libjpeg-turbo，ARM上使用NEON加速的JPEG编码）
+TURBOJPEG_AVAILABLE = False
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    print("⚠️ PyTurboJPEG 不可用，视频帧使用 OpenCV 编码")
+
+
+def cpu_supports_int8_dot() -> bool:
+    """检查CPU是否支持 SDOT/UDOT 整数点积指令（ARMv8.2 asimddp）"""
     try:
-        import board
-        import adafruit_dht
-        DHT_AVAILABLE = True
-        print("✓ DHT11 传感器库可用")
-    except ImportError:
-        print("⚠️ DHT11 库不可用，温湿度功能禁用")
+        with open("/proc/cpuinfo") as f:
+            return "asimddp" in f.read()
+    except OSError:
+        return False
+
+
+def set_thread_affinity(cores: Set[int]) -> bool:
+    """将当前线程绑定到指定CPU核心（仅Linux，需在目标线程内调用）"""
+    if not cores or not hasattr(os, "sched_setaffinity"):
+        return False
+    try:
+        # 只使用当前允许的核心（如单核容器/taskset 限制下），一个都没有时不绑定
+        allowed = cores & os.sched_getaffinity(0)
+        if not allowed:
+            return False
+        os.sched_setaffinity(0, allowed)
+        return True
+    except OSError as e:
+        print(f"⚠️ 绑定CPU核心失败: {e}")
+        return False
+
+
+def set_thread_nice(value: int) -> bool:
+    """调整当前线程的 nice 值（Linux 上 nice 作用于调用线程，负值需要 CAP_SYS_NICE）"""
+    if value == 0 or not hasattr(os, "nice"):
+        return False
+    try:
+        os.nice(value)
+        return True
+    except OSError as e:
+        print(f"⚠️ 调整线程优先级失败: {e}")
+        return False
+
+
+def set_thread_realtime(priority: int) -> bool:
+    """将当前线程设为 SCHED_FIFO 实时调度（需要 root 或 CAP_SYS_NICE）"""
+    if priority <= 0 or not hasattr(os, "sched_setscheduler"):
+        return False
+    try:
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+        return True
+    except OSError as e:
+        print(f"⚠️ 设置实时调度失败（需要 CAP_SYS_NICE）: {e}")
+        return False
+
 
 # ==================== 配置 ====================
 SERVER_URL = "http://localhost:8000"
@@ -64,10 +125,35 @@ ENABLE_VIDEO_STREAM = True
 VIDEO_STREAM_FPS = 10
 VIDEO_QUALITY = 50
 
+# 传感器上报去重：温湿度变化不超过阈值时不重复上报，但最长间隔仍会上报一次作为心跳
+SENSOR_REPORT_TEMP_DELTA = 0.2      # °C
+SENSOR_REPORT_HUMIDITY_DELTA = 0.5  # %
+SENSOR_REPORT_MAX_INTERVAL = 60.0   # 秒
+
 # 树莓派优化：降低分辨率提高帧率
 CAMERA_WIDTH = 480
 CAMERA_HEIGHT = 360
 
+# picamera2 输出 YUV420（每像素1.5字节，ISP写内存的带宽比 RGB888 减半）
+# 关闭时使用 RGB888：libcamera 按小端像素值命名，RGB888 在内存中为 [B, G, R]，即 OpenCV 的 BGR，无需转换
+PICAMERA2_YUV420 = True
+
+# 运动门控：画面无变化时跳过YOLO推理（仅危险区域模式）
+MOTION_GATE_ENABLED = True
+MOTION_THRESHOLD = 2.0         # 80x60灰度图与上次检测帧的平均灰度差，低于此值视为无运动
+MOTION_FORCE_INTERVAL = 2.0    # 最长跳过时间（秒），到时强制检测一次，防止缓慢进入漏检
+
+# 危险区域检测步长：每N个摄像头帧最多推理一次，其余帧沿用上次结果（推理本身已在 320 输入上进行）
+DETECT_EVERY_N_FRAMES = 2
+
+# 线程调度（仅Linux）：采集线程和显示线程各固定在一个核心上，避免与推理线程争抢缓存
+# 检测线程不绑核：NCNN 的推理线程继承创建线程的亲和性，绑到单核会让4个推理线程挤在一个核上
+# 绑核在各线程处理完第一帧后进行：OpenCV 的并行线程池由首次并行调用的线程创建并继承其亲和性
+CAPTURE_CPU_CORES = {1}             # 采集线程使用的核心，空集合表示不绑定
+CAPTURE_NICE = -5                   # 采集线程 nice 值调整，负值需要 CAP_SYS_NICE，0 表示不调整
+RENDER_CPU_CORES = {3}              # 主线程（叠加层绘制/显示/推流）使用的核心，空集合表示不绑定
+DETECTION_RT_PRIORITY = 0           # 检测线程 SCHED_FIFO 优先级（1-99），0 表示不启用（推理线程会继承该调度策略）
+
 
 class DetectionMode(Enum):
     """检测模式"""
@@ -86,6 +172,7 @@ class PersonState(Enum):
 class TrackedPerson:
     """追踪的人员信息 - 带状态防抖"""
     track_id: str                    # 追踪ID
+    track_num: int                   # 追踪序号（track_id 中的数字，用于统计）
     bbox: Tuple[int, int, int, int]  # 边界框
     center: Tuple[int, int]          # 中心点
     confirmed_state: PersonState     # 已确认的状态（用于触发事件）
@@ -100,18 +187,20 @@ class TrackedPerson:
     # 状态变化最小间隔（秒）
     STATE_CHANGE_INTERVAL: float = 1.5
     
-    def update_position(self, bbox: Tuple[int, int, int, int], center: Tuple[int, int]):
+    def update_position(self, bbox: Tuple[int, int, int, int], center: Tuple[int, int],
+                        current_time: Optional[float] = None):
         """仅更新位置信息"""
         self.bbox = bbox
         self.center = center
-        self.last_seen = time.time()
+        self.last_seen = current_time if current_time is not None else time.time()
     
-    def update_state(self, raw_state: PersonState) -> Optional[str]:
+    def update_state(self, raw_state: PersonState, current_time: Optional[float] = None) -> Optional[str]:
         """
         更新状态（带防抖）
         返回: None=无变化, "enter"=进入危险区, "exit"=离开危险区
         """
-        current_time = time.time()
+        if current_time is None:
+            current_time = time.time()
         
         # 冷却期内不处理状态变化
         if current_time < self.state_change_cooldown:
@@ -144,35 +233,43 @@ class TrackedPerson:
 
 @dataclass
 class ZoneStatistics:
-    """危险区域统计信息"""
+    """
+    危险区域统计信息
+    
+    只由检测线程写入（单写者），主线程显示时直接读取各整数字段，不加锁；
+    显示允许与检测结果相差一帧。重置统计也交给检测线程执行。
+    """
     total_entries: int = 0           # 总进入次数
     total_exits: int = 0             # 总离开次数
     current_in_danger: int = 0       # 当前在危险区的人数
-    persons_in_danger: Set[str] = field(default_factory=set)  # 当前在危险区的人员ID集合
     
-    def person_entered(self, track_id: str):
+    def __post_init__(self):
+        # 当前在危险区的追踪序号（不作为字段，to_dict/显示只读取上面的整数）
+        self._in_danger: Set[int] = set()
+    
+    def person_entered(self, track_num: int):
         """人员进入危险区"""
-        if track_id not in self.persons_in_danger:
-            self.persons_in_danger.add(track_id)
+        if track_num not in self._in_danger:
+            self._in_danger.add(track_num)
             self.total_entries += 1
-            self.current_in_danger = len(self.persons_in_danger)
+            self.current_in_danger += 1
             return True
         return False
     
-    def person_exited(self, track_id: str):
+    def person_exited(self, track_num: int):
         """人员离开危险区"""
-        if track_id in self.persons_in_danger:
-            self.persons_in_danger.discard(track_id)
+        if track_num in self._in_danger:
+            self._in_danger.discard(track_num)
             self.total_exits += 1
-            self.current_in_danger = len(self.persons_in_danger)
+            self.current_in_danger -= 1
             return True
         return False
     
-    def remove_person(self, track_id: str):
+    def remove_person(self, track_num: int):
         """移除人员（离开画面）"""
-        if track_id in self.persons_in_danger:
-            self.persons_in_danger.discard(track_id)
-            self.current_in_danger = len(self.persons_in_danger)
+        if track_num in self._in_danger:
+            self._in_danger.discard(track_num)
+            self.current_in_danger -= 1
     
     def to_dict(self) -> dict:
         """转换为字典"""
@@ -192,6 +289,140 @@ class AlertInfo:
     message: str
     bbox: Tuple[int, int, int, int]
     event_type: str = "enter"  # enter=进入, exit=离开
+    iso_timestamp: Optional[str] = None  # ISO格式时间戳（上报服务器用）
+
+
+# ==================== 绘制工具 ====================
+@dataclass
+class TextSprite:
+    """
+    预渲染的文字图块
+
+    cv2.putText 每帧都要重新光栅化字形，开销较大。
+    固定文字只渲染一次，之后每帧按ROI切片拷贝即可。
+    """
+    image: np.ndarray        # BGR图块
+    mask: np.ndarray         # 文字像素掩码 (H, W, 1)
+    origin: Tuple[int, int]  # putText基线起点在图块内的坐标
+    advance: int             # 文字宽度（拼接时的步进）
+
+    @classmethod
+    def render(cls, text: str, font_scale: float, color: Tuple[int, int, int],
+               thickness: int = 1) -> "TextSprite":
+        """用 cv2.putText 渲染一次文字"""
+        (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        pad = thickness
+        image = np.zeros((th + baseline + 2 * pad, tw + 2 * pad, 3), dtype=np.uint8)
+        origin = (pad, th + pad)
+        cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+        mask = image.any(axis=2, keepdims=True)
+        return cls(image=image, mask=mask, origin=origin, advance=tw - (thickness + 1) // 2)
+
+    @classmethod
+    def concat(cls, sprites: List["TextSprite"]) -> "TextSprite":
+        """按基线横向拼接多个图块"""
+        above = max(s.origin[1] for s in sprites)
+        below = max(s.image.shape[0] - s.origin[1] for s in sprites)
+
+        # 每个图块左上角的x坐标
+        origin_x = max(s.origin[0] for s in sprites)
+        lefts = []
+        x = origin_x
+        for s in sprites:
+            lefts.append(x - s.origin[0])
+            x += s.advance
+        width = max(left + s.image.shape[1] for left, s in zip(lefts, sprites))
+
+        image = np.zeros((above + below, width, 3), dtype=np.uint8)
+        mask = np.zeros((above + below, width, 1), dtype=bool)
+        for left, s in zip(lefts, sprites):
+            sh, sw = s.image.shape[:2]
+            top = above - s.origin[1]
+            region = (slice(top, top + sh), slice(left, left + sw))
+            np.copyto(image[region], s.image, where=s.mask)
+            mask[region] |= s.mask
+
+        return cls(image=image, mask=mask, origin=(origin_x, above), advance=x - origin_x)
+
+    @classmethod
+    def compose(cls, items: List[Tuple["TextSprite", Tuple[int, int]]]) -> "TextSprite":
+        """
+        将多个图块按各自的位置合成为一个图块（后面的覆盖前面的）
+        合成结果 blit 到 (0, 0) 与逐个 blit 到各自位置的效果一致
+        """
+        x0 = min(org[0] - s.origin[0] for s, org in items)
+        y0 = min(org[1] - s.origin[1] for s, org in items)
+        x1 = max(org[0] - s.origin[0] + s.image.shape[1] for s, org in items)
+        y1 = max(org[1] - s.origin[1] + s.image.shape[0] for s, org in items)
+
+        image = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0, 1), dtype=bool)
+        for s, org in items:
+            sh, sw = s.image.shape[:2]
+            top, left = org[1] - s.origin[1] - y0, org[0] - s.origin[0] - x0
+            region = (slice(top, top + sh), slice(left, left + sw))
+            np.copyto(image[region], s.image, where=s.mask)
+            mask[region] |= s.mask
+
+        return cls(image=image, mask=mask, origin=(-x0, -y0), advance=x1 - x0)
+
+    def blit(self, frame: np.ndarray, org: Tuple[int, int]):
+        """将图块拷贝到帧上，org 与 cv2.putText 的 org 含义一致"""
+        sh, sw = self.image.shape[:2]
+        fh, fw = frame.shape[:2]
+        x0 = org[0] - self.origin[0]
+        y0 = org[1] - self.origin[1]
+
+        # 裁剪到帧范围内
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1, sy1 = min(sw, fw - x0), min(sh, fh - y0)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+
+        np.copyto(frame[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1],
+                  self.image[sy0:sy1, sx0:sx1],
+                  where=self.mask[sy0:sy1, sx0:sx1])
+
+
+@dataclass
+class ZoneLayers:
+    """
+    预渲染的区域静态图层
+    
+    区域填充（半透明混合）和线条/文字（不透明）都不随帧变化，
+    只需在区域或分辨率变化时重建，每帧一次混合即可完成绘制。
+    """
+    fill: Optional[np.ndarray]          # 区域填充色，无区域时为 None
+    uncovered: Optional[np.ndarray]     # 未被区域覆盖的像素掩码 (H, W, 1)，全覆盖时为 None
+    line_index: np.ndarray              # 线条/文字像素的扁平索引
+    line_pixels: np.ndarray             # 线条/文字像素颜色
+    
+    def draw(self, frame: np.ndarray, in_place: bool = False,
+             out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        一次混合生成输出帧，再写入线条和文字像素
+        Args:
+            in_place: 是否直接在 frame 上绘制
+            out: 预分配的输出缓冲区（与 frame 同尺寸），为 None 时新分配
+        """
+        if self.fill is not None:
+            if in_place and self.uncovered is None:
+                output = cv2.addWeighted(self.fill, 0.3, frame, 0.7, 0, dst=frame)
+            else:
+                # 区域未覆盖整帧时需要原图还原未覆盖部分，不能原地混合
+                output = cv2.addWeighted(self.fill, 0.3, frame, 0.7, 0, dst=out)
+                if self.uncovered is not None:
+                    np.copyto(output, frame, where=self.uncovered)
+        elif in_place:
+            output = frame
+        elif out is not None:
+            np.copyto(out, frame)
+            output = out
+        else:
+            output = frame.copy()
+        
+        output.reshape(-1, 3)[self.line_index] = self.line_pixels
+        return output
 
 
 # ==================== 服务器通信 ====================
@@ -203,21 +434,61 @@ class ServerClient:
         self.device_id = device_id
         self._current_mode = DetectionMode.ZONE
         self._mode_lock = threading.Lock()
+        
+        # 首次创建客户端时才导入 requests，禁用服务器上报时不占用内存
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        # 复用同一个HTTP会话（keep-alive），避免每次请求重新建立TCP连接
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8, max_retries=0)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
+        # JPEG编码器：优先使用 TurboJPEG，加载失败（缺少 libturbojpeg）时回退到 OpenCV
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+                print("✓ 视频帧使用 TurboJPEG 编码")
+            except Exception as e:
+                print(f"⚠️ TurboJPEG 初始化失败，使用 OpenCV 编码: {e}")
+        
+        # 视频帧发送队列：JPEG编码和HTTP发送在独立线程中进行，队列满时丢弃最旧的帧
+        self._tx_queue = queue.Queue(maxsize=2)
+        self._tx_thread = threading.Thread(target=self._tx_worker, daemon=True)
+        self._tx_thread.start()
+        
+        # 检测模式由后台线程轮询
+        self._mode_thread = threading.Thread(target=self._mode_poll_worker, daemon=True)
+        self._mode_thread.start()
     
     def get_detection_mode(self) -> DetectionMode:
-        """从服务器获取当前检测模式"""
-        try:
-            response = requests.get(
-                f"{self.server_url}/api/detection/mode/{self.device_id}",
-                timeout=1
-            )
-            if response.status_code == 200:
-                data = response.json()
-                mode_str = data.get("mode", "zone")
-                return DetectionMode.PRODUCT if mode_str == "product" else DetectionMode.ZONE
-        except Exception:
-            pass
-        return self._current_mode
+        """获取当前检测模式（由后台线程轮询服务器，这里只读缓存，不阻塞检测线程）"""
+        with self._mode_lock:
+            return self._current_mode
+    
+    def _mode_poll_worker(self):
+        """检测模式轮询线程：服务器不可达时指数退避，最长10秒"""
+        backoff = 1.0
+        while True:
+            try:
+                response = self.session.get(
+                    f"{self.server_url}/api/detection/mode/{self.device_id}",
+                    timeout=0.5
+                )
+                if response.status_code == 200:
+                    data = response.json()
+                    mode_str = data.get("mode", "zone")
+                    with self._mode_lock:
+                        self._current_mode = DetectionMode.PRODUCT if mode_str == "product" else DetectionMode.ZONE
+                    backoff = 1.0
+                    time.sleep(1.0)
+                    continue
+            except Exception:
+                pass
+            time.sleep(backoff)
+            backoff = min(10.0, backoff * 2)
     
     def report_detection(self, person_count: int, in_danger_zone: bool, alert_triggered: bool):
         """上报危险区域检测结果"""
@@ -228,11 +499,12 @@ class ServerClient:
                 "in_danger_zone": in_danger_zone,
                 "alert_triggered": alert_triggered
             }
-            requests.post(f"{self.server_url}/api/detection", json=data, timeout=2)
+            self.session.post(f"{self.server_url}/api/detection", json=data, timeout=2)
         except Exception:
             pass
     
-    def report_zone_event(self, event_type: str, statistics: dict, message: str):
+    def report_zone_event(self, event_type: str, statistics: dict, message: str,
+                          timestamp: Optional[str] = None):
         """
         上报危险区域事件（进入/离开）
         
@@ -240,6 +512,7 @@ class ServerClient:
             event_type: 事件类型 (enter/exit)
             statistics: 统计信息
             message: 事件消息
+            timestamp: ISO格式时间戳，为空时取当前时间
         """
         try:
             data = {
@@ -247,9 +520,25 @@ class ServerClient:
                 "event_type": event_type,
                 "statistics": statistics,
                 "message": message,
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp or datetime.now().isoformat()
+            }
+            self.session.post(f"{self.server_url}/api/zone/event", json=data, timeout=2)
+        except Exception:
+            pass
+    
+    def report_sensor_batch(self, readings: List[dict]):
+        """
+        批量上报传感器数据
+        
+        Args:
+            readings: [{"sensor_type": str, "value": float, "unit": str}, ...]
+        """
+        try:
+            data = {
+                "device_id": self.device_id,
+                "readings": readings
             }
-            requests.post(f"{self.server_url}/api/zone/event", json=data, timeout=2)
+            self.session.post(f"{self.server_url}/api/sensor/batch", json=data, timeout=2)
         except Exception:
             pass
     
@@ -264,24 +553,51 @@ class ServerClient:
                 "confidence": result.get("confidence", 0),
                 "timestamp": datetime.now().isoformat()
             }
-            requests.post(f"{self.server_url}/api/product/detection", json=data, timeout=2)
+            self.session.post(f"{self.server_url}/api/product/detection", json=data, timeout=2)
         except Exception:
             pass
     
     def send_video_frame(self, frame: np.ndarray, detection_info: dict = None):
-        """发送视频帧"""
+        """发送视频帧（非阻塞，放入发送队列）"""
+        item = (frame, detection_info)
+        try:
+            self._tx_queue.put_nowait(item)
+        except queue.Full:
+            # 丢弃最旧的帧，保证发送的总是最新画面
+            try:
+                self._tx_queue.get_nowait()
+            except queue.Empty:
+                pass
+            try:
+                self._tx_queue.put_nowait(item)
+            except queue.Full:
+                pass
+    
+    def _tx_worker(self):
+        """视频帧发送线程"""
+        while True:
+            frame, detection_info = self._tx_queue.get()
+            self._send_video_frame(frame, detection_info)
+    
+    def _send_video_frame(self, frame: np.ndarray, detection_info: dict = None):
+        """编码并发送视频帧（multipart 直接上传JPEG，不做base64编码）"""
         try:
-            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), VIDEO_QUALITY]
-            _, buffer = cv2.imencode('.jpg', frame, encode_param)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
+            if self._tj is not None:
+                jpeg = self._tj.encode(frame, quality=VIDEO_QUALITY,
+                                       pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+            else:
+                encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), VIDEO_QUALITY]
+                _, buffer = cv2.imencode('.jpg', frame, encode_param)
+                jpeg = buffer.tobytes()
             
             data = {
                 "device_id": self.device_id,
-                "frame": frame_base64,
                 "timestamp": datetime.now().isoformat(),
-                "detection": detection_info
+                "detection": json.dumps(detection_info)
             }
-            requests.post(f"{self.server_url}/api/video/frame", json=data, timeout=1)
+            files = {"frame": ("frame.jpg", jpeg, "image/jpeg")}
+            self.session.post(f"{self.server_url}/api/video/frame/upload",
+                              data=data, files=files, timeout=1)
         except Exception:
             pass
 
@@ -292,7 +608,7 @@ class PersonTracker:
     稳定的人员追踪器 - 带状态防抖
     
     核心改进：
-    1. 使用IOU匹配而非单纯距离匹配，提高追踪稳定性
+    1. 使用IOU匹配而非单纯距离匹配，提高追踪稳定性；每帧做全局最优匹配（匈牙利算法）
     2. 状态变化需要连续多帧确认（防抖）
     3. 状态变化有冷却时间，避免边界抖动
     4. 新人员需要稳定后才触发事件
@@ -309,67 +625,59 @@ class PersonTracker:
         self.timeout = timeout
         self.next_id = 0
     
-    def _generate_id(self) -> str:
-        """生成唯一ID"""
+    def _generate_id(self) -> Tuple[str, int]:
+        """生成唯一ID，同时返回数字序号"""
         self.next_id += 1
-        return f"person_{self.next_id}"
-    
-    def _calculate_distance(self, p1: Tuple[int, int], p2: Tuple[int, int]) -> float:
-        """计算两点距离"""
-        return np.sqrt((p1[0] - p2[0])**2 + (p1[1] - p2[1])**2)
+        return f"person_{self.next_id}", self.next_id
     
-    def _calculate_iou(self, box1: Tuple[int, int, int, int], box2: Tuple[int, int, int, int]) -> float:
-        """计算两个边界框的IOU"""
-        x1 = max(box1[0], box2[0])
-        y1 = max(box1[1], box2[1])
-        x2 = min(box1[2], box2[2])
-        y2 = min(box1[3], box2[3])
+    @staticmethod
+    def _calculate_iou_matrix(boxes1: np.ndarray, boxes2: np.ndarray) -> np.ndarray:
+        """计算两组边界框两两之间的IOU矩阵 (N, M)"""
+        x1 = np.maximum(boxes1[:, None, 0], boxes2[None, :, 0])
+        y1 = np.maximum(boxes1[:, None, 1], boxes2[None, :, 1])
+        x2 = np.minimum(boxes1[:, None, 2], boxes2[None, :, 2])
+        y2 = np.minimum(boxes1[:, None, 3], boxes2[None, :, 3])
         
-        inter_area = max(0, x2 - x1) * max(0, y2 - y1)
-        box1_area = (box1[2] - box1[0]) * (box1[3] - box1[1])
-        box2_area = (box2[2] - box2[0]) * (box2[3] - box2[1])
-        union_area = box1_area + box2_area - inter_area
+        inter_area = np.maximum(0, x2 - x1) * np.maximum(0, y2 - y1)
+        area1 = (boxes1[:, 2] - boxes1[:, 0]) * (boxes1[:, 3] - boxes1[:, 1])
+        area2 = (boxes2[:, 2] - boxes2[:, 0]) * (boxes2[:, 3] - boxes2[:, 1])
+        union_area = area1[:, None] + area2[None, :] - inter_area
         
-        return inter_area / union_area if union_area > 0 else 0
+        return np.divide(inter_area, union_area, out=np.zeros_like(inter_area), where=union_area > 0)
     
-    def _find_best_match(self, bbox: Tuple[int, int, int, int], center: Tuple[int, int], 
-                         matched_ids: Set[str]) -> Optional[str]:
+    def _match_detections(self, boxes: np.ndarray, centers: List[Tuple[int, int]]) -> Dict[int, str]:
         """
-        找到最佳匹配的已追踪人员
-        优先使用IOU匹配，其次使用距离匹配
+        将检测结果与已追踪人员做全局最优匹配
+        得分 = IOU * 0.7 + 距离得分 * 0.3，只有 IOU > 0.3 或距离足够近才允许匹配
+        Returns:
+            {检测序号: track_id}
         """
-        best_match = None
-        best_score = 0
+        if len(boxes) == 0 or not self.tracked_persons:
+            return {}
         
-        for track_id, person in self.tracked_persons.items():
-            if track_id in matched_ids:
-                continue
-            
-            # 计算IOU
-            iou = self._calculate_iou(bbox, person.bbox)
-            
-            # 计算距离得分（归一化到0-1）
-            distance = self._calculate_distance(center, person.center)
-            distance_score = max(0, 1 - distance / self.max_distance)
-            
-            # 综合得分：IOU权重更高
-            score = iou * 0.7 + distance_score * 0.3
-            
-            # IOU > 0.3 或 距离足够近
-            if (iou > 0.3 or distance < self.max_distance) and score > best_score:
-                best_score = score
-                best_match = track_id
+        track_ids = list(self.tracked_persons)
+        track_boxes = np.array([self.tracked_persons[t].bbox for t in track_ids], dtype=np.float64)
+        track_centers = np.array([self.tracked_persons[t].center for t in track_ids], dtype=np.float64)
         
-        return best_match
+        iou = self._calculate_iou_matrix(boxes, track_boxes)
+        distance = cdist(np.array(centers, dtype=np.float64), track_centers)
+        distance_score = np.maximum(0, 1 - distance / self.max_distance)
+        score = iou * 0.7 + distance_score * 0.3
+        valid = (iou > 0.3) | (distance < self.max_distance)
+        
+        # 不允许的配对给一个极大代价，分配后再过滤掉
+        cost = np.where(valid, -score, 1e9)
+        rows, cols = linear_sum_assignment(cost)
+        return {int(r): track_ids[c] for r, c in zip(rows, cols) if valid[r, c]}
     
     def update(self, detections: List[Tuple[int, int, int, int, float]], 
-               get_state_func: Callable[[Tuple[int, int]], PersonState]) -> List[dict]:
+               get_states_func: Callable[[List[Tuple[int, int]]], List[PersonState]]) -> List[dict]:
         """
         更新追踪状态
         
         Args:
             detections: 检测结果列表 [(x1, y1, x2, y2, conf), ...]
-            get_state_func: 获取人员状态的函数（根据中心点判断是否在危险区）
+            get_states_func: 批量获取人员状态的函数（根据中心点判断是否在危险区）
         
         Returns:
             状态变化事件列表 [{"track_id": str, "event": "enter"/"exit", "bbox": tuple}, ...]
@@ -378,26 +686,31 @@ class PersonTracker:
         current_time = time.time()
         matched_ids: Set[str] = set()
         
+        # 使用脚部中心点，所有人员的区域判断一次完成
+        centers = [(int((x1 + x2) / 2), int(y2)) for x1, y1, x2, y2, _ in detections]
+        raw_states = get_states_func(centers)
+        
+        # 与已有人员做全局匹配
+        boxes = np.array([d[:4] for d in detections], dtype=np.float64).reshape(-1, 4)
+        matches = self._match_detections(boxes, centers)
+        
         # 处理每个检测结果
-        for detection in detections:
+        for i, (detection, center, raw_state) in enumerate(zip(detections, centers, raw_states)):
             x1, y1, x2, y2, conf = detection
             bbox = (x1, y1, x2, y2)
-            center = (int((x1 + x2) / 2), int(y2))  # 使用脚部中心点
-            raw_state = get_state_func(center)
-            
-            # 尝试匹配已有人员
-            match_id = self._find_best_match(bbox, center, matched_ids)
+            match_id = matches.get(i)
             
             if match_id:
                 # 匹配到已有人员
                 person = self.tracked_persons[match_id]
-                person.update_position(bbox, center)
+                person.update_position(bbox, center, current_time)
                 
-                # 更新状态（带防抖）
-                event_type = person.update_state(raw_state)
+                # 更新状态（带防抖），同一帧使用同一个时间
+                event_type = person.update_state(raw_state, current_time)
                 if event_type:
                     events.append({
                         "track_id": match_id,
+                        "track_num": person.track_num,
                         "event": event_type,
                         "bbox": bbox,
                         "center": center
@@ -406,9 +719,10 @@ class PersonTracker:
                 matched_ids.add(match_id)
             else:
                 # 新人员 - 初始状态为SAFE，需要通过防抖确认
-                new_id = self._generate_id()
+                new_id, new_num = self._generate_id()
                 new_person = TrackedPerson(
                     track_id=new_id,
+                    track_num=new_num,
                     bbox=bbox,
                     center=center,
                     confirmed_state=PersonState.SAFE,  # 初始假设在安全区
@@ -430,6 +744,7 @@ class PersonTracker:
                     if person.confirmed_state == PersonState.DANGER:
                         events.append({
                             "track_id": track_id,
+                            "track_num": person.track_num,
                             "event": "exit",
                             "bbox": person.bbox,
                             "center": person.center
@@ -440,6 +755,10 @@ class PersonTracker:
         
         return events
     
+    def is_settled(self) -> bool:
+        """所有人员状态都已确认（没有正在防抖中的状态变化）"""
+        return all(p.pending_state == p.confirmed_state for p in self.tracked_persons.values())
+    
     def get_persons_in_danger(self) -> List[TrackedPerson]:
         """获取当前在危险区的人员列表"""
         return [p for p in self.tracked_persons.values() if p.confirmed_state == PersonState.DANGER]
@@ -457,13 +776,30 @@ class ZoneDetector:
     def __init__(self, model_path: str = "yolov8n_ncnn_model", frame_skip: int = 3,
                  input_size: Tuple[int, int] = (320, 320), alert_cooldown: float = 3.0):
         print("正在加载YOLOv8模型...")
-        self.model = YOLO(model_path)
-        # NCNN 模型不需要 fuse()
-        if model_path.endswith(".pt"):
-            self.model.fuse()
+        self.model = None
+        self.net = None
+        
+        if NCNN_AVAILABLE and os.path.isdir(model_path):
+            # 直接加载NCNN模型
+            self.net = ncnn.Net()
+            self.net.opt.use_vulkan_compute = False
+            self.net.opt.use_fp16_arithmetic = True
+            self.net.opt.num_threads = 4
+            self.net.load_param(os.path.join(model_path, "model.ncnn.param"))
+            self.net.load_model(os.path.join(model_path, "model.ncnn.bin"))
+        else:
+            self.model = YOLO(model_path)
+            # NCNN 模型不需要 fuse()
+            if model_path.endswith(".pt"):
+                self.model.fuse()
         
         self.danger_zones: List[np.ndarray] = []
         self.safe_zones: List[np.ndarray] = []
+        self._danger_convex: List[bool] = []  # 区域是否为凸多边形（可批量判断）
+        self._safe_convex: List[bool] = []
+        self._static_layers: Optional[ZoneLayers] = None
+        self.zones_version = 0                # 区域变化时递增，供外部缓存的图层判断是否失效
+        self._static_shape = None             # 静态图层对应的帧尺寸，None表示需要重建
         self.alert_callback: Optional[Callable] = None
         self.exit_callback: Optional[Callable] = None  # 离开危险区回调
         self.person_class_id = 0
@@ -471,11 +807,14 @@ class ZoneDetector:
         self.frame_skip = frame_skip
         self.frame_count = 0
         self.input_size = input_size
+        # 显式指定推理尺寸 (h, w)，否则 .pt 模型默认 imgsz=640，会把已缩放的输入再 letterbox 放大
+        self._imgsz = (input_size[1], input_size[0]) if input_size else 640
         self.alert_cooldown = alert_cooldown
         self.last_alert_time = {}
         self.last_detections = []
         self.scale_x = 1.0
         self.scale_y = 1.0
+        self.nms_threshold = 0.7  # 与 Ultralytics 默认 iou 一致
         
         # 人员追踪器 - 增大匹配距离和超时时间，提高稳定性
         self.tracker = PersonTracker(max_distance=150, timeout=3.0)
@@ -483,14 +822,82 @@ class ZoneDetector:
         # 统计信息
         self.statistics = ZoneStatistics()
         
+        # 文字预渲染：人员标签、统计文字的固定部分和数字图集，每帧只做拼接和拷贝
+        self._label_sprites = {
+            True: TextSprite.render("DANGER!", 0.5, (0, 0, 255), 2),
+            False: TextSprite.render("Person", 0.5, (0, 255, 0), 2),
+        }
+        self._hud_styles = {
+            "warning": (0.8, (0, 0, 255), 2),
+            "persons": (0.6, (255, 255, 255), 2),
+            "in_danger": (0.6, (0, 0, 255), 2),
+            "entries": (0.5, (255, 200, 100), 1),
+        }
+        self._hud_digits = {key: [TextSprite.render(str(d), *style) for d in range(10)]
+                            for key, style in self._hud_styles.items()}
+        self._hud_text_sprites = {}  # (样式, 文字) -> 图块
+        self._hud_sprites = {}       # 样式 -> (内容, 拼接后的图块)
+        
         print(f"✓ YOLOv8模型加载完成")
         print(f"✓ 人员追踪器已启用")
     
     def add_danger_zone(self, points: List[Tuple[int, int]]):
-        self.danger_zones.append(np.array(points, dtype=np.int32))
+        zone = np.array(points, dtype=np.int32)
+        self.danger_zones.append(zone)
+        self._danger_convex.append(cv2.isContourConvex(zone))
+        self._static_shape = None
+        self.zones_version += 1
     
     def add_safe_zone(self, points: List[Tuple[int, int]]):
-        self.safe_zones.append(np.array(points, dtype=np.int32))
+        zone = np.array(points, dtype=np.int32)
+        self.safe_zones.append(zone)
+        self._safe_convex.append(cv2.isContourConvex(zone))
+        self._static_shape = None
+        self.zones_version += 1
+    
+    def build_static_layers(self, h: int, w: int, warning_x: Optional[int] = None,
+                            mode_label: str = "[ZONE MODE]", mode_label_x: Optional[int] = None) -> ZoneLayers:
+        """
+        预渲染不随帧变化的图层：
+        - 区域填充色（半透明混合用）
+        - 区域边框、警戒线、文字（不透明，按像素索引直接写入）
+        Args:
+            warning_x: 警戒线x坐标，默认画面中线
+            mode_label: 右上角模式标识
+            mode_label_x: 模式标识x坐标，默认 w - 150
+        """
+        fill = np.zeros((h, w, 3), dtype=np.uint8)
+        for zone in self.danger_zones:
+            cv2.fillPoly(fill, [zone], (0, 0, 200))
+        for zone in self.safe_zones:
+            cv2.fillPoly(fill, [zone], (0, 200, 0))
+        covered = fill.any(axis=2)
+        
+        # 边框按颜色一次性绘制（多个折线一次调用）
+        lines = np.zeros((h, w, 3), dtype=np.uint8)
+        if self.danger_zones:
+            cv2.polylines(lines, self.danger_zones, True, (0, 0, 255), 2)
+        if self.safe_zones:
+            cv2.polylines(lines, self.safe_zones, True, (0, 255, 0), 2)
+        
+        if warning_x is None:
+            warning_x = w // 2
+        if mode_label_x is None:
+            mode_label_x = w - 150
+        cv2.line(lines, (warning_x, 0), (warning_x, h), (0, 255, 255), 2)
+        cv2.putText(lines, "WARNING LINE", (warning_x + 10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        cv2.putText(lines, mode_label, (mode_label_x, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        
+        line_index = np.flatnonzero(lines.any(axis=2))
+        return ZoneLayers(
+            fill=fill if covered.any() else None,
+            # 区域未覆盖整帧时，未覆盖部分需要还原为原图
+            uncovered=None if covered.all() else ~covered[..., None],
+            line_index=line_index,
+            line_pixels=lines.reshape(-1, 3)[line_index]
+        )
     
     def set_alert_callback(self, callback: Callable):
         """设置进入危险区报警回调"""
@@ -507,15 +914,203 @@ class ZoneDetector:
         x1, y1, x2, y2 = bbox
         return (int((x1 + x2) / 2), int(y2))
     
-    def _get_person_state(self, center: Tuple[int, int]) -> PersonState:
-        """根据中心点判断人员状态"""
-        for zone in self.danger_zones:
-            if self._point_in_zone(center, zone):
-                return PersonState.DANGER
-        for zone in self.safe_zones:
-            if self._point_in_zone(center, zone):
-                return PersonState.SAFE
-        return PersonState.UNKNOWN
+    def _points_in_zones(self, points: np.ndarray, zones: List[np.ndarray],
+                         convex_flags: List[bool]) -> np.ndarray:
+        """
+        批量判断点是否落在任一区域内（含边界，与 pointPolygonTest >= 0 一致）
+        凸多边形：所有边的叉积同号即在内部，一次numpy运算完成
+        非凸多边形：射线法统计穿越边数（奇数在内部），另判断是否落在边上，同样一次numpy运算完成
+        Returns:
+            布尔数组 (N,)
+        """
+        inside = np.zeros(len(points), dtype=bool)
+        if len(points) == 0:
+            return inside
+        
+        for zone, convex in zip(zones, convex_flags):
+            if convex:
+                start = zone.astype(np.int64)
+                edge = np.roll(start, -1, axis=0) - start              # (M, 2)
+                rel = points[:, None, :] - start[None, :, :]           # (N, M, 2)
+                cross = edge[:, 0] * rel[..., 1] - edge[:, 1] * rel[..., 0]
+                inside |= (cross >= 0).all(axis=1) | (cross <= 0).all(axis=1)
+            else:
+                start = zone.astype(np.int64)
+                end = np.roll(start, -1, axis=0)
+                x1, y1, x2, y2 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+                px, py = points[:, 0, None], points[:, 1, None]                 # (N, 1)
+                cross = (x2 - x1) * (py - y1) - (y2 - y1) * (px - x1)           # (N, M)
+                on_edge = ((cross == 0)
+                           & (px >= np.minimum(x1, x2)) & (px <= np.maximum(x1, x2))
+                           & (py >= np.minimum(y1, y2)) & (py <= np.maximum(y1, y2)))
+                # 向右的水平射线穿过该边：边跨过 py，且交点在点的右侧（整数运算，无除法）
+                hits = ((y1 > py) != (y2 > py)) & (cross * (y2 - y1) > 0)
+                inside |= (hits.sum(axis=1) % 2 == 1) | on_edge.any(axis=1)
+        return inside
+    
+    def _points_in_danger(self, points: np.ndarray) -> np.ndarray:
+        """批量判断点是否在危险区域"""
+        return self._points_in_zones(points, self.danger_zones, self._danger_convex)
+    
+    def _get_person_states(self, centers: List[Tuple[int, int]]) -> List[PersonState]:
+        """根据中心点批量判断人员状态（危险区优先）"""
+        points = np.array(centers, dtype=np.int64).reshape(-1, 2)
+        in_danger = self._points_in_danger(points)
+        in_safe = self._points_in_zones(points, self.safe_zones, self._safe_convex)
+        return [PersonState.DANGER if d else (PersonState.SAFE if sf else PersonState.UNKNOWN)
+                for d, sf in zip(in_danger, in_safe)]
+    
+    def _letterbox_params(self, w: int, h: int) -> Tuple[float, int, int, int, int]:
+        """
+        计算等比例缩放 + 补边参数（与 Ultralytics letterbox 的 auto 模式一致）
+        只补到32的倍数，不补成正方形：480x360 → 320x240 → 补边到 320x256
+        Returns:
+            (缩放比例, 缩放后宽, 缩放后高, 左右补边总量, 上下补边总量)
+        """
+        target_w, target_h = self.input_size if self.input_size else (w, h)
+        ratio = min(target_w / w, target_h / h)
+        new_w, new_h = int(round(w * ratio)), int(round(h * ratio))
+        pad_w = (new_w + 31) // 32 * 32 - new_w
+        pad_h = (new_h + 31) // 32 * 32 - new_h
+        return ratio, new_w, new_h, pad_w, pad_h
+    
+    def _infer_ncnn(self, frame: np.ndarray, conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """
+        直接调用NCNN推理并解码YOLOv8输出
+        Returns:
+            检测结果列表 [(x1, y1, x2, y2, conf), ...]（原图坐标）
+        """
+        h_orig, w_orig = frame.shape[:2]
+        ratio, new_w, new_h, pad_w, pad_h = self._letterbox_params(w_orig, h_orig)
+        left, top = pad_w // 2, pad_h // 2
+        self.scale_x = self.scale_y = 1 / ratio
+        
+        # 等比例缩放 + BGR→RGB 在NCNN内部一次完成，再补灰边（114与训练时一致）
+        mat_in = ncnn.Mat.from_pixels_resize(frame, ncnn.Mat.PixelType.PIXEL_BGR2RGB,
+                                             w_orig, h_orig, new_w, new_h)
+        if pad_w or pad_h:
+            mat_in = ncnn.copy_make_border(mat_in, top, pad_h - top, left, pad_w - left,
+                                           ncnn.BorderType.BORDER_CONSTANT, 114.0)
+        mat_in.substract_mean_normalize([], [1 / 255.0] * 3)
+        
+        ex = self.net.create_extractor()
+        ex.input("in0", mat_in)
+        _, mat_out = ex.extract("out0")
+        
+        # 输出形状 (4 + 类别数, 锚点数)：cx, cy, w, h, 各类别得分
+        pred = np.array(mat_out)
+        scores = pred[4 + self.person_class_id]
+        keep = scores > conf_threshold
+        if not keep.any():
+            return []
+        
+        cx, cy, bw, bh = pred[:4, keep]
+        scores = scores[keep]
+        boxes = np.stack([cx - bw / 2 - left, cy - bh / 2 - top, bw, bh], axis=1)
+        indices = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), conf_threshold, self.nms_threshold)
+        
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        xyxy = boxes[indices]
+        xyxy[:, 2:] += xyxy[:, :2]
+        return self._to_detections(xyxy, scores[indices])
+    
+    def _infer_ultralytics(self, frame: np.ndarray, conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """通过 Ultralytics 推理（.pt 模型或未安装 ncnn 时使用）"""
+        h_orig, w_orig = frame.shape[:2]
+        if self.input_size:
+            resized = cv2.resize(frame, self.input_size)
+            self.scale_x = w_orig / self.input_size[0]
+            self.scale_y = h_orig / self.input_size[1]
+        else:
+            resized = frame
+            self.scale_x = self.scale_y = 1.0
+        
+        results = self.model(resized, imgsz=self._imgsz, conf=conf_threshold,
+                             classes=[self.person_class_id], verbose=False, device='cpu')
+        
+        detections = []
+        for result in results:
+            if len(result.boxes) == 0:
+                continue
+            # 整个张量一次性转换，避免逐框 .cpu().numpy()
+            xyxy = result.boxes.xyxy.cpu().numpy().astype(np.int32)
+            confs = result.boxes.conf.cpu().numpy()
+            detections.extend(self._to_detections(xyxy, confs))
+        return detections
+    
+    def _to_detections(self, xyxy: np.ndarray, confs: np.ndarray) -> List[Tuple[int, int, int, int, float]]:
+        """将推理尺寸下的边界框批量缩放回原图坐标"""
+        scale = np.array([self.scale_x, self.scale_y, self.scale_x, self.scale_y])
+        xyxy = (xyxy * scale).astype(np.int32)
+        return list(zip(*xyxy.T.tolist(), confs.tolist()))
+    
+    def _get_hud_sprite(self, key: str, parts: tuple) -> TextSprite:
+        """
+        获取统计文字图块（内容未变化时直接复用）
+        Args:
+            key: 文字样式
+            parts: 文字片段，str 为固定文字，int 用数字图集拼接
+        """
+        cached = self._hud_sprites.get(key)
+        if cached is not None and cached[0] == parts:
+            return cached[1]
+        
+        sprites = []
+        for part in parts:
+            if isinstance(part, int):
+                sprites.extend(self._hud_digits[key][int(d)] for d in str(part))
+            else:
+                text_sprite = self._hud_text_sprites.get((key, part))
+                if text_sprite is None:
+                    text_sprite = TextSprite.render(part, *self._hud_styles[key])
+                    self._hud_text_sprites[(key, part)] = text_sprite
+                sprites.append(text_sprite)
+        
+        sprite = TextSprite.concat(sprites)
+        self._hud_sprites[key] = (parts, sprite)
+        return sprite
+    
+    def draw_persons(self, output: np.ndarray, detections: List[Tuple[int, int, int, int, float]]):
+        """绘制人员检测框、标签和中心点（危险区判断一次批量完成）"""
+        if not detections:
+            return
+        
+        centers = [self._get_person_center(d[:4]) for d in detections]
+        danger_mask = self._points_in_danger(np.array(centers, dtype=np.int64).reshape(-1, 2))
+        
+        # 检测框按颜色各一次 polylines（cv2.rectangle 内部也是画四点闭合折线，结果一致）
+        boxes = np.array([d[:4] for d in detections], dtype=np.int32)
+        corners = boxes[:, [0, 1, 2, 1, 2, 3, 0, 3]].reshape(-1, 4, 2)
+        for in_danger, color in ((False, (0, 255, 0)), (True, (0, 0, 255))):
+            selected = corners[danger_mask == in_danger]
+            if len(selected):
+                cv2.polylines(output, list(selected), True, color, 2)
+        
+        for detection, center, in_danger in zip(detections, centers, danger_mask):
+            x1, y1 = detection[:2]
+            self._label_sprites[bool(in_danger)].blit(output, (x1, y1 - 10))
+            cv2.circle(output, center, 4, (0, 0, 255) if in_danger else (0, 255, 0), -1)
+    
+    def draw_hud(self, output: np.ndarray, person_count: int):
+        """显示统计信息（预渲染图块拼接，避免每帧 putText）"""
+        stats = self.statistics
+        y_offset = 30
+        
+        # 警告信息
+        if stats.current_in_danger > 0:
+            self._get_hud_sprite("warning", ("WARNING: ", stats.current_in_danger, " in DANGER ZONE!")
+                                 ).blit(output, (10, y_offset))
+            y_offset += 30
+        
+        # 统计信息
+        self._get_hud_sprite("persons", ("Persons: ", person_count)).blit(output, (10, y_offset))
+        y_offset += 25
+        
+        self._get_hud_sprite("in_danger", ("In Danger: ", stats.current_in_danger)).blit(output, (10, y_offset))
+        y_offset += 25
+        
+        self._get_hud_sprite("entries", ("Entries: ", stats.total_entries, " | Exits: ", stats.total_exits)
+                             ).blit(output, (10, y_offset))
     
     def get_statistics(self) -> dict:
         """获取统计信息"""
@@ -527,136 +1122,86 @@ class ZoneDetector:
         self.tracker.reset()
         print("✓ 统计信息已重置")
     
-    def detect(self, frame: np.ndarray, conf_threshold: float = 0.5) -> Tuple[np.ndarray, dict]:
-        """执行危险区域检测（异步模式下每次调用都执行检测）"""
+    def detect(self, frame: np.ndarray, conf_threshold: float = 0.5,
+               in_place: bool = False, draw: bool = True) -> Tuple[np.ndarray, dict]:
+        """
+        执行危险区域检测（异步模式下每次调用都执行检测）
+        Args:
+            frame: BGR图像
+            conf_threshold: 置信度阈值
+            in_place: 是否直接在 frame 上绘制（调用方不再使用原始帧时可省去一次整帧拷贝）
+            draw: 是否绘制结果，为 False 时不拷贝也不绘制，返回原始帧
+        """
         h_orig, w_orig = frame.shape[:2]
-        output = frame.copy()
         
         events = []  # 状态变化事件
         
         # YOLO检测 - 异步模式下每次都执行
-        if self.input_size:
-            resized = cv2.resize(frame, self.input_size)
-            self.scale_x = w_orig / self.input_size[0]
-            self.scale_y = h_orig / self.input_size[1]
+        if self.net is not None:
+            self.last_detections = self._infer_ncnn(frame, conf_threshold)
         else:
-            resized = frame
-            self.scale_x = self.scale_y = 1.0
-        
-        results = self.model(resized, conf=conf_threshold, classes=[self.person_class_id],
-                           verbose=False, device='cpu')
-        
-        self.last_detections = []
-        for result in results:
-            for box in result.boxes:
-                x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                conf = float(box.conf[0])
-                x1, y1 = int(x1 * self.scale_x), int(y1 * self.scale_y)
-                x2, y2 = int(x2 * self.scale_x), int(y2 * self.scale_y)
-                self.last_detections.append((x1, y1, x2, y2, conf))
+            self.last_detections = self._infer_ultralytics(frame, conf_threshold)
         
         # 更新追踪器并获取状态变化事件
-        events = self.tracker.update(self.last_detections, self._get_person_state)
+        events = self.tracker.update(self.last_detections, self._get_person_states)
+        
+        # 同一帧内的事件共用一个时间戳
+        if events:
+            now = datetime.now()
+            ts_str = now.strftime("%Y-%m-%d %H:%M:%S")
+            ts_iso = now.isoformat()
         
         # 处理状态变化事件
         for event in events:
-            track_id = event["track_id"]
+            track_num = event["track_num"]
             event_type = event["event"]
             bbox = event["bbox"]
             
-            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            
             if event_type == "enter":
                 # 进入危险区
-                self.statistics.person_entered(track_id)
+                self.statistics.person_entered(track_num)
                 if self.alert_callback:
                     alert = AlertInfo(
-                        timestamp=timestamp,
+                        timestamp=ts_str,
                         zone_type="danger",
                         person_count=self.statistics.current_in_danger,
                         message=f"⚠️ 人员进入危险区域！当前危险区人数: {self.statistics.current_in_danger}",
                         bbox=bbox,
-                        event_type="enter"
+                        event_type="enter",
+                        iso_timestamp=ts_iso
                     )
                     self.alert_callback(alert)
             
             elif event_type == "exit":
                 # 离开危险区
-                self.statistics.person_exited(track_id)
+                self.statistics.person_exited(track_num)
                 if self.exit_callback:
                     alert = AlertInfo(
-                        timestamp=timestamp,
+                        timestamp=ts_str,
                         zone_type="safe",
                         person_count=self.statistics.current_in_danger,
                         message=f"✅ 人员离开危险区域！当前危险区人数: {self.statistics.current_in_danger}",
                         bbox=bbox,
-                        event_type="exit"
+                        event_type="exit",
+                        iso_timestamp=ts_iso
                     )
                     self.exit_callback(alert)
         
-        # 绘制区域
-        overlay = output.copy()
-        for zone in self.danger_zones:
-            cv2.fillPoly(overlay, [zone], (0, 0, 200))
-            cv2.polylines(output, [zone], True, (0, 0, 255), 2)
-        for zone in self.safe_zones:
-            cv2.fillPoly(overlay, [zone], (0, 200, 0))
-            cv2.polylines(output, [zone], True, (0, 255, 0), 2)
-        cv2.addWeighted(overlay, 0.3, output, 0.7, 0, output)
-        
-        # 绘制警戒线
-        mid_x = w_orig // 2
-        cv2.line(output, (mid_x, 0), (mid_x, h_orig), (0, 255, 255), 2)
-        cv2.putText(output, "WARNING LINE", (mid_x + 10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
-        # 处理检测结果并绘制
-        danger_count = 0
         person_count = len(self.last_detections)
-        
-        for detection in self.last_detections:
-            x1, y1, x2, y2, conf = detection
-            center = self._get_person_center((x1, y1, x2, y2))
-            in_danger = any(self._point_in_zone(center, zone) for zone in self.danger_zones)
-            
-            if in_danger:
-                danger_count += 1
-                color = (0, 0, 255)
-                label = "DANGER!"
-            else:
-                color = (0, 255, 0)
-                label = "Person"
+        if draw:
+            # 绘制区域、警戒线和模式标识（静态图层，只在区域或分辨率变化时重建）
+            if self._static_shape != (h_orig, w_orig):
+                self._static_layers = self.build_static_layers(h_orig, w_orig)
+                self._static_shape = (h_orig, w_orig)
+            output = self._static_layers.draw(frame, in_place)
             
-            cv2.rectangle(output, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(output, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-            cv2.circle(output, center, 4, color, -1)
+            # 处理检测结果并绘制
+            self.draw_persons(output, self.last_detections)
+            self.draw_hud(output, person_count)
+        else:
+            output = frame
         
-        # 显示统计信息
         stats = self.statistics
-        y_offset = 30
-        
-        # 警告信息
-        if stats.current_in_danger > 0:
-            cv2.putText(output, f"WARNING: {stats.current_in_danger} in DANGER ZONE!", (10, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-            y_offset += 30
-        
-        # 统计信息
-        cv2.putText(output, f"Persons: {person_count}", (10, y_offset),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-        y_offset += 25
-        
-        cv2.putText(output, f"In Danger: {stats.current_in_danger}", (10, y_offset),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-        y_offset += 25
-        
-        cv2.putText(output, f"Entries: {stats.total_entries} | Exits: {stats.total_exits}", (10, y_offset),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 200, 100), 1)
-        
-        # 模式标识
-        cv2.putText(output, "[ZONE MODE]", (w_orig - 150, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-        
         detection_info = {
             "mode": "zone",
             "person_count": person_count,
@@ -688,13 +1233,15 @@ class ProductDetector:
             "lower": np.array([100, 100, 100]),
             "upper": np.array([130, 255, 255]),
             "name": "蓝色",
-            "display_color": (255, 150, 50)
+            "display_color": (255, 150, 50),
+            "display_color_bright": (255, 200, 100)   # 已确认产品时使用（各通道+50）
         },
         "cyan": {
             "lower": np.array([75, 100, 100]),
             "upper": np.array([95, 255, 255]),
             "name": "青色",
-            "display_color": (200, 200, 50)
+            "display_color": (200, 200, 50),
+            "display_color_bright": (250, 250, 100)
         }
     }
     
@@ -704,10 +1251,31 @@ class ProductDetector:
         ("cyan", "circle"): "product_b",       # 青色圆形 → 产品B
     }
     
+    # 形状显示名称
+    SHAPE_NAMES = {"circle": "圆形", "rectangle": "方形"}
+    
+    # 尚无检测结果时返回的默认结果（只读，所有调用共享）
+    _EMPTY_RESULT = {
+        "mode": "product",
+        "detected": False,
+        "product_type": "unknown",
+        "color": "未知",
+        "shape": "未知",
+        "confidence": 0.0,
+        "in_roi": False,
+        "is_new": False,
+        "size": None
+    }
+    
     SHAPE_CIRCULARITY_THRESHOLD = 0.7
     MIN_CONTOUR_AREA = 1000
     MAX_CONTOUR_AREA = 100000
     
+    # 形态学核（类级别常量，避免每帧每种颜色重复分配）
+    _MORPH_KERNEL = cv2.getStructuringElement(cv2.MORPH_RECT, (5, 5))
+    # 两次5x5矩形膨胀等价于一次9x9矩形膨胀
+    _MORPH_KERNEL_DILATE = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9))
+    
     def __init__(self, frame_skip: int = 3, stability_frames: int = 3, auto_count: bool = True):
         """
         初始化产品检测器
@@ -726,7 +1294,9 @@ class ProductDetector:
         
         # 稳定性检测
         self.stability_frames = stability_frames
-        self.consecutive_detections = []  # 连续检测结果队列
+        self.consecutive_detections = deque(maxlen=stability_frames)  # 连续检测结果队列（定长）
+        self._run_product = None          # 队尾连续相同的产品
+        self._run_length = 0              # 队尾连续相同产品的帧数
         self.confirmed_product = None     # 已确认的产品
         
         # 自动计数
@@ -734,24 +1304,56 @@ class ProductDetector:
         self.product_in_roi = False       # 产品是否在检测区域内
         self.last_confirmed_product = None  # 上一个确认的产品（用于离开时计数）
         
+        # 颜色显示名称
+        self._color_names = {k: v["name"] for k, v in self.COLOR_RANGES.items()}
+        
         # ROI检测区域（相对比例）
         self.roi_margin = 0.15  # 边距比例，0.15表示上下左右各留15%
+        self._roi_cache = None  # ((h, w), ROI坐标)，分辨率变化时重新计算
         
         # 缓存上一次的检测结果（用于跳帧时显示）
         self.last_result = None
+        self._skip_result = self._EMPTY_RESULT  # 跳帧时返回的结果（is_new 已置为 False），随 last_result 更新
         self.last_contours = []
         self.last_color_type = "unknown"
         self.last_bbox = None
         
+        # 计数标签预渲染：固定前缀 + 数字图集，计数变化时才重新拼接
+        self._count_labels = {}
+        self._digit_atlas = {}
+        for product_type, color_type, prefix in (("product_a", "blue", "Product A: "),
+                                                 ("product_b", "cyan", "Product B: ")):
+            display_color = self.COLOR_RANGES[color_type]["display_color"]
+            self._count_labels[product_type] = TextSprite.render(prefix, 0.6, display_color, 2)
+            self._digit_atlas[product_type] = [TextSprite.render(str(d), 0.6, display_color, 2)
+                                               for d in range(10)]
+        self._count_sprites = {}  # product_type -> (计数, 拼接后的图块)
+        self._stats_panel = None  # ((计数A, 计数B, 稳定帧数), 统计面板图块)
+        
+        # 固定文字预渲染：ROI标签、稳定性标签、模式标识
+        self._roi_label = TextSprite.render("Detection ROI", 0.5, (100, 200, 100), 1)
+        self._stability_label = TextSprite.render("Stability", 0.35, (150, 150, 150), 1)
+        mode_text = "[PRODUCT MODE]"
+        if self.auto_count:
+            mode_text += " [AUTO]"
+        self._mode_label = TextSprite.render(mode_text, 0.5, (255, 150, 50), 2)
+        self._text_sprites = {}  # (文字, 字号, 颜色, 线宽) -> 图块，用于取值有限的标签
+        
         print(f"✓ 产品检测器初始化完成")
         print(f"  跳帧: {frame_skip} | 稳定帧数: {stability_frames} | 自动计数: {auto_count}")
     
     def _get_roi(self, frame: np.ndarray) -> Tuple[int, int, int, int]:
         """获取ROI区域坐标"""
-        h, w = frame.shape[:2]
-        margin_x = int(w * self.roi_margin)
-        margin_y = int(h * self.roi_margin)
-        return margin_x, margin_y, w - margin_x, h - margin_y
+        return self._get_roi_for_shape(frame.shape[:2])
+    
+    def _get_roi_for_shape(self, frame_shape: Tuple[int, int]) -> Tuple[int, int, int, int]:
+        """按帧尺寸获取ROI区域坐标（缓存，帧尺寸不变时直接复用）"""
+        h, w = frame_shape[:2]
+        if self._roi_cache is None or self._roi_cache[0] != (h, w):
+            margin_x = int(w * self.roi_margin)
+            margin_y = int(h * self.roi_margin)
+            self._roi_cache = ((h, w), (margin_x, margin_y, w - margin_x, h - margin_y))
+        return self._roi_cache[1]
     
     def _is_in_roi(self, bbox: Tuple[int, int, int, int], frame_shape: Tuple[int, int]) -> bool:
         """判断物体中心是否在ROI内"""
@@ -760,7 +1362,7 @@ class ProductDetector:
         center_x = x + bw // 2
         center_y = y + bh // 2
         
-        roi_x1, roi_y1, roi_x2, roi_y2 = self._get_roi(np.zeros((h, w, 3), dtype=np.uint8))
+        roi_x1, roi_y1, roi_x2, roi_y2 = self._get_roi_for_shape((h, w))
         return roi_x1 < center_x < roi_x2 and roi_y1 < center_y < roi_y2
     
     def detect_color(self, frame: np.ndarray) -> Tuple[str, np.ndarray]:
@@ -772,9 +1374,11 @@ class ProductDetector:
         h, w = frame.shape[:2]
         roi_x1, roi_y1, roi_x2, roi_y2 = self._get_roi(frame)
         
-        # 只处理ROI区域
+        # 只处理ROI区域，颜色判断在半分辨率上进行（像素量减为1/4）
         roi_frame = frame[roi_y1:roi_y2, roi_x1:roi_x2]
-        hsv = cv2.cvtColor(roi_frame, cv2.COLOR_BGR2HSV)
+        small = cv2.resize(roi_frame, None, fx=0.5, fy=0.5, interpolation=cv2.INTER_AREA)
+        hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV)
+        min_area = self.MIN_CONTOUR_AREA // 4
         
         best_match = "unknown"
         best_area = 0
@@ -782,18 +1386,21 @@ class ProductDetector:
         
         for color_name, color_range in self.COLOR_RANGES.items():
             mask = cv2.inRange(hsv, color_range["lower"], color_range["upper"])
-            kernel = np.ones((5, 5), np.uint8)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_OPEN, kernel)
-            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, kernel)
+            # 开运算+闭运算 = 腐蚀→膨胀→膨胀→腐蚀，合并中间两次膨胀，4遍变3遍，结果完全一致
+            mask = cv2.erode(mask, self._MORPH_KERNEL)
+            mask = cv2.dilate(mask, self._MORPH_KERNEL_DILATE)
+            mask = cv2.erode(mask, self._MORPH_KERNEL)
             area = cv2.countNonZero(mask)
             
-            if area > best_area and area > self.MIN_CONTOUR_AREA:
+            if area > best_area and area > min_area:
                 best_area = area
                 best_match = color_name
                 best_mask = mask
         
-        # 将ROI掩码扩展到完整帧大小
+        # 将ROI掩码还原到原分辨率并扩展到完整帧大小（供形状检测使用）
         if best_mask is not None:
+            best_mask = cv2.resize(best_mask, (roi_x2 - roi_x1, roi_y2 - roi_y1),
+                                   interpolation=cv2.INTER_NEAREST)
             full_mask = np.zeros((h, w), dtype=np.uint8)
             full_mask[roi_y1:roi_y2, roi_x1:roi_x2] = best_mask
             return best_match, full_mask
@@ -810,13 +1417,14 @@ class ProductDetector:
         if not contours:
             return "unknown", [], None
         
-        valid_contours = [c for c in contours
-                        if self.MIN_CONTOUR_AREA < cv2.contourArea(c) < self.MAX_CONTOUR_AREA]
-        if not valid_contours:
+        # 每个轮廓的面积只计算一次
+        valid = [(cv2.contourArea(c), c) for c in contours]
+        valid = [(a, c) for a, c in valid if self.MIN_CONTOUR_AREA < a < self.MAX_CONTOUR_AREA]
+        if not valid:
             return "unknown", [], None
         
-        largest = max(valid_contours, key=cv2.contourArea)
-        area = cv2.contourArea(largest)
+        valid_contours = [c for _, c in valid]
+        area, largest = max(valid, key=lambda item: item[0])
         perimeter = cv2.arcLength(largest, True)
         
         if perimeter == 0:
@@ -853,22 +1461,106 @@ class ProductDetector:
         Returns:
             (确认的产品类型, 是否新确认)
         """
+        # 定长队列自动淘汰最旧的结果
         self.consecutive_detections.append(product_type)
         
-        # 保持队列长度
-        if len(self.consecutive_detections) > self.stability_frames:
-            self.consecutive_detections.pop(0)
+        # 增量维护连续计数，不再每帧遍历整个队列
+        if product_type == self._run_product:
+            self._run_length += 1
+        else:
+            self._run_product = product_type
+            self._run_length = 1
         
         # 检查是否连续检测到同一产品
-        if len(self.consecutive_detections) >= self.stability_frames:
-            if all(p == product_type and p != "unknown" for p in self.consecutive_detections):
-                if self.confirmed_product != product_type:
-                    self.confirmed_product = product_type
-                    return product_type, True  # 新确认
-                return product_type, False  # 已确认
+        if self._run_length >= self.stability_frames and product_type != "unknown":
+            if self.confirmed_product != product_type:
+                self.confirmed_product = product_type
+                return product_type, True  # 新确认
+            return product_type, False  # 已确认
         
         return self.confirmed_product or "unknown", False
     
+    def _reset_stability(self):
+        """清空稳定性检测队列"""
+        self.consecutive_detections.clear()
+        self._run_product = None
+        self._run_length = 0
+    
+    def _get_count_sprite(self, product_type: str) -> TextSprite:
+        """获取计数标签图块（计数未变化时直接复用）"""
+        count = self.detection_count[product_type]
+        cached = self._count_sprites.get(product_type)
+        if cached is not None and cached[0] == count:
+            return cached[1]
+        
+        atlas = self._digit_atlas[product_type]
+        sprite = TextSprite.concat([self._count_labels[product_type]] +
+                                   [atlas[int(d)] for d in str(count)])
+        self._count_sprites[product_type] = (count, sprite)
+        return sprite
+    
+    def _get_text_sprite(self, text: str, font_scale: float, color: Tuple[int, int, int],
+                         thickness: int) -> TextSprite:
+        """获取文字图块（首次使用时渲染，之后复用）"""
+        key = (text, font_scale, color, thickness)
+        sprite = self._text_sprites.get(key)
+        if sprite is None:
+            sprite = TextSprite.render(text, font_scale, color, thickness)
+            self._text_sprites[key] = sprite
+        return sprite
+    
+    def _get_stats_panel(self) -> TextSprite:
+        """获取左上角统计面板图块（计数和稳定性进度均为离散值，未变化时直接复用）"""
+        run = len(self.consecutive_detections)
+        key = (self.detection_count["product_a"], self.detection_count["product_b"], run)
+        if self._stats_panel is not None and self._stats_panel[0] == key:
+            return self._stats_panel[1]
+        
+        # 稳定性指示器
+        stability_progress = run / self.stability_frames
+        bar_width = 100
+        bar_x = 10
+        bar_y = 75
+        bar_fill = (0, 200, 0) if stability_progress >= 1 else (200, 200, 0)
+        bars = [((bar_x, bar_y), (bar_x + bar_width, bar_y + 8), (50, 50, 50)),
+                ((bar_x, bar_y), (bar_x + int(bar_width * stability_progress), bar_y + 8), bar_fill)]
+        sprites = [(self._get_count_sprite("product_a"), (10, 30)),
+                   (self._get_count_sprite("product_b"), (10, 55)),
+                   (self._stability_label, (bar_x + bar_width + 5, bar_y + 8))]
+        
+        # 面板范围（帧坐标），各元素按原绘制顺序写入，后绘制的覆盖先绘制的
+        x0 = min([bar_x] + [org[0] - sp.origin[0] for sp, org in sprites])
+        y0 = min([bar_y] + [org[1] - sp.origin[1] for sp, org in sprites])
+        x1 = max([bar_x + bar_width + 1] + [org[0] - sp.origin[0] + sp.image.shape[1] for sp, org in sprites])
+        y1 = max([bar_y + 9] + [org[1] - sp.origin[1] + sp.image.shape[0] for sp, org in sprites])
+        image = np.zeros((y1 - y0, x1 - x0, 3), dtype=np.uint8)
+        mask = np.zeros((y1 - y0, x1 - x0, 1), dtype=np.uint8)
+        
+        def put_sprite(sprite, org):
+            left, top = org[0] - sprite.origin[0] - x0, org[1] - sprite.origin[1] - y0
+            sh, sw = sprite.image.shape[:2]
+            region = (slice(top, top + sh), slice(left, left + sw))
+            np.copyto(image[region], sprite.image, where=sprite.mask)
+            mask[region] |= sprite.mask
+        
+        for sprite, org in sprites[:2]:
+            put_sprite(sprite, org)
+        for pt1, pt2, color in bars:
+            pt1, pt2 = (pt1[0] - x0, pt1[1] - y0), (pt2[0] - x0, pt2[1] - y0)
+            cv2.rectangle(image, pt1, pt2, color, -1)
+            cv2.rectangle(mask, pt1, pt2, 1, -1)
+        put_sprite(*sprites[2])
+        
+        panel = TextSprite(image=image, mask=mask.astype(bool),
+                           origin=(-x0, -y0), advance=x1 - x0)
+        self._stats_panel = (key, panel)
+        return panel
+    
+    def draw_counts(self, output: np.ndarray):
+        """绘制产品计数（使用预渲染图块，避免每帧 putText）"""
+        self._get_count_sprite("product_a").blit(output, (10, 30))
+        self._get_count_sprite("product_b").blit(output, (10, 55))
+    
     def _handle_auto_count(self, product_in_roi: bool, confirmed_product: str):
         """处理自动计数逻辑"""
         if not self.auto_count:
@@ -884,25 +1576,29 @@ class ProductDetector:
                     print(f"\n📦 自动计数: {self.last_confirmed_product} | 总计: {self.detection_count[self.last_confirmed_product]}")
                     # 重置确认状态
                     self.confirmed_product = None
-                    self.consecutive_detections.clear()
+                    self._reset_stability()
         
         # 更新状态
         self.product_in_roi = product_in_roi
         if confirmed_product != "unknown":
             self.last_confirmed_product = confirmed_product
     
-    def detect(self, frame: np.ndarray) -> Tuple[np.ndarray, dict]:
+    def detect(self, frame: np.ndarray, in_place: bool = False,
+               draw: bool = True) -> Tuple[np.ndarray, dict]:
         """
         执行产品检测（带跳帧优化和稳定性检测）
+        Args:
+            frame: BGR图像
+            in_place: 是否直接在 frame 上绘制（调用方不再使用原始帧时可省去一次整帧拷贝）
+            draw: 是否绘制结果，为 False 时不拷贝也不绘制，返回原始帧
         """
-        output = frame.copy()
-        h, w = output.shape[:2]
-        
-        # 绘制ROI区域
-        roi_x1, roi_y1, roi_x2, roi_y2 = self._get_roi(frame)
-        cv2.rectangle(output, (roi_x1, roi_y1), (roi_x2, roi_y2), (100, 200, 100), 2)
-        cv2.putText(output, "Detection ROI", (roi_x1 + 5, roi_y1 - 8), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 200, 100), 1)
+        result = self._analyze(frame)
+        output = self._render(frame, result, in_place) if draw else frame
+        return output, result
+    
+    def _analyze(self, frame: np.ndarray) -> dict:
+        """执行检测并更新计数/稳定性状态，只返回结果字典，不绘制"""
+        h, w = frame.shape[:2]
         
         # 跳帧控制
         self.frame_count += 1
@@ -928,7 +1624,7 @@ class ProductDetector:
             else:
                 # 不在ROI内或未检测到，清空稳定性队列
                 if not product_in_roi:
-                    self.consecutive_detections.clear()
+                    self._reset_stability()
             
             # 处理自动计数
             self._handle_auto_count(product_in_roi, confirmed_product)
@@ -941,52 +1637,67 @@ class ProductDetector:
                 "mode": "product",
                 "detected": confirmed_product != "unknown",
                 "product_type": confirmed_product,
-                "color": self.COLOR_RANGES.get(color_type, {}).get("name", "未知"),
-                "shape": "圆形" if shape_type == "circle" else ("方形" if shape_type == "rectangle" else "未知"),
+                "color": self._color_names.get(color_type, "未知"),
+                "shape": self.SHAPE_NAMES.get(shape_type, "未知"),
                 "confidence": confidence if confirmed_product != "unknown" else 0.0,
                 "in_roi": product_in_roi,
                 "is_new": is_new_confirmation,
                 "size": {"width": bbox[2], "height": bbox[3]} if bbox else None
             }
+            # 跳帧时强制 is_new 为 False，避免重复上报；只在结果更新时拷贝一次
+            self._skip_result = ({**self.last_result, "is_new": False}
+                                 if is_new_confirmation else self.last_result)
+            return self.last_result
         
-        # 使用缓存的结果绘制
-        result = self.last_result or {
-            "mode": "product",
-            "detected": False,
-            "product_type": "unknown",
-            "color": "未知",
-            "shape": "未知",
-            "confidence": 0.0,
-            "in_roi": False,
-            "is_new": False,
-            "size": None
-        }
+        # 跳帧时沿用上一次的检测结果
+        return self._skip_result
+    
+    def _render(self, frame: np.ndarray, result: dict, in_place: bool = False,
+                out: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        按检测结果绘制ROI、轮廓、计数和稳定性指示
+        Args:
+            in_place: 是否直接在 frame 上绘制
+            out: 预分配的输出缓冲区（与 frame 同尺寸），为 None 时新分配
+        """
+        h, w = frame.shape[:2]
+        # 检测线程会整体替换这些缓存，先取出本次绘制使用的引用
+        color_type, contours, bbox = self.last_color_type, self.last_contours, self.last_bbox
+        
+        if in_place:
+            output = frame
+        elif out is not None:
+            np.copyto(out, frame)
+            output = out
+        else:
+            output = frame.copy()
         
-        # 如果是跳帧，强制is_new为False，避免重复上报
-        if not should_detect and result.get("is_new"):
-            result = result.copy()
-            result["is_new"] = False
+        # 绘制ROI区域
+        roi_x1, roi_y1, roi_x2, roi_y2 = self._get_roi(frame)
+        cv2.rectangle(output, (roi_x1, roi_y1), (roi_x2, roi_y2), (100, 200, 100), 2)
+        self._roi_label.blit(output, (roi_x1 + 5, roi_y1 - 8))
         
         # 绘制轮廓和标注
-        if self.last_contours and self.last_bbox:
-            color_info = self.COLOR_RANGES.get(self.last_color_type, {})
-            display_color = color_info.get("display_color", (128, 128, 128))
+        if contours and bbox:
+            color_info = self.COLOR_RANGES.get(color_type, {})
             
             # 如果已确认产品，用更亮的颜色
             if result["detected"]:
-                display_color = tuple(min(255, c + 50) for c in display_color)
+                display_color = color_info.get("display_color_bright", (178, 178, 178))
+            else:
+                display_color = color_info.get("display_color", (128, 128, 128))
             
-            cv2.drawContours(output, self.last_contours, -1, display_color, 2)
+            cv2.drawContours(output, contours, -1, display_color, 2)
             
-            x, y, bw, bh = self.last_bbox
+            x, y, bw, bh = bbox
             cv2.rectangle(output, (x, y), (x+bw, y+bh), display_color, 2)
             
             # 产品标签
             if result["detected"]:
                 product_label = "Product A ✓" if result["product_type"] == "product_a" else "Product B ✓"
-                cv2.putText(output, product_label, (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, display_color, 2)
+                self._get_text_sprite(product_label, 0.7, display_color, 2).blit(output, (x, y - 10))
             else:
-                cv2.putText(output, "Detecting...", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (150, 150, 150), 1)
+                self._get_text_sprite("Detecting...", 0.6, (150, 150, 150), 1).blit(output, (x, y - 10))
             
             # 详细信息
             info_y = y + bh + 18
@@ -998,39 +1709,24 @@ class ProductDetector:
                 cv2.putText(output, f"Size: {result['size']['width']}x{result['size']['height']}px", (x, info_y),
                            cv2.FONT_HERSHEY_SIMPLEX, 0.4, (180, 180, 180), 1)
         
-        # 统计信息
-        cv2.putText(output, f"Product A: {self.detection_count['product_a']}", (10, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.COLOR_RANGES["blue"]["display_color"], 2)
-        cv2.putText(output, f"Product B: {self.detection_count['product_b']}", (10, 55),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.COLOR_RANGES["cyan"]["display_color"], 2)
-        
-        # 稳定性指示器
-        stability_progress = len(self.consecutive_detections) / self.stability_frames
-        bar_width = 100
-        bar_x = 10
-        bar_y = 75
-        cv2.rectangle(output, (bar_x, bar_y), (bar_x + bar_width, bar_y + 8), (50, 50, 50), -1)
-        cv2.rectangle(output, (bar_x, bar_y), (bar_x + int(bar_width * stability_progress), bar_y + 8), 
-                     (0, 200, 0) if stability_progress >= 1 else (200, 200, 0), -1)
-        cv2.putText(output, "Stability", (bar_x + bar_width + 5, bar_y + 8), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.35, (150, 150, 150), 1)
+        # 统计信息和稳定性指示器（整块面板图块，计数或稳定帧数变化时才重建）
+        self._get_stats_panel().blit(output, (0, 0))
         
         # 模式标识
-        mode_text = "[PRODUCT MODE]"
-        if self.auto_count:
-            mode_text += " [AUTO]"
-        cv2.putText(output, mode_text, (w - 220, 30),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 150, 50), 2)
+        self._mode_label.blit(output, (w - 220, 30))
         
-        return output, result
+        return output
     
-    def capture(self, frame: np.ndarray) -> Optional[dict]:
-        """手动捕获检测（用于手动计数）"""
+    def capture(self, result: dict) -> Optional[dict]:
+        """
+        手动捕获检测（用于手动计数）
+        Args:
+            result: 当前帧 _analyze() 的结果；不再重新分析同一帧，避免稳定性计数重复推进
+        """
         current_time = time.time()
         if current_time - self.last_detection_time < self.detection_cooldown:
             return None
         
-        _, result = self.detect(frame)
         if result["detected"] and result["product_type"] != "unknown":
             self.last_detection_time = current_time
             self.detection_count[result["product_type"]] += 1
@@ -1042,7 +1738,7 @@ class ProductDetector:
         """重置计数"""
         self.detection_count = {"product_a": 0, "product_b": 0, "unknown": 0}
         self.confirmed_product = None
-        self.consecutive_detections.clear()
+        self._reset_stability()
         print("✓ 产品计数已重置")
 
 
@@ -1062,7 +1758,22 @@ class DHT11Sensor:
         self.last_humidity = None
         self.initialized = False
         
-        if DHT_AVAILABLE:
+        # 后台读取线程：DHT11 单次读取耗时较长，不能阻塞主循环
+        self._latest = (None, None)  # 最近一次读取结果（整体替换，读取方无需加锁）
+        self._reader_running = False
+        self._reader_thread = None
+        
+        # DHT11 库（含 Blinka 硬件抽象层）较大，创建传感器时才导入
+        dht_available = False
+        if IS_LINUX:
+            try:
+                import board
+                import adafruit_dht
+                dht_available = True
+            except ImportError:
+                pass
+        
+        if dht_available:
             try:
                 # 根据 pin 号选择对应的 board 针脚
                 pin_map = {4: board.D4, 17: board.D17, 27: board.D27, 22: board.D22}
@@ -1101,8 +1812,29 @@ class DHT11Sensor:
         # 返回上次成功读取的值
         return self.last_temperature, self.last_humidity
     
+    def start(self, interval: float = 2.0):
+        """启动后台读取线程（DHT11 两次读取间隔不能小于1秒）"""
+        if not self.initialized or self._reader_running:
+            return
+        self._reader_running = True
+        self._reader_thread = threading.Thread(target=self._reader_loop, args=(interval,), daemon=True)
+        self._reader_thread.start()
+    
+    def _reader_loop(self, interval: float):
+        """后台读取循环"""
+        while self._reader_running:
+            self._latest = self.read()
+            time.sleep(interval)
+    
+    def get_latest(self) -> Tuple[Optional[float], Optional[float]]:
+        """获取后台线程最近一次读取的温湿度（不阻塞）"""
+        return self._latest
+    
     def cleanup(self):
         """清理资源"""
+        self._reader_running = False
+        if self._reader_thread and self._reader_thread.is_alive():
+            self._reader_thread.join(timeout=3.0)
         if self.dht_device:
             try:
                 self.dht_device.exit()
@@ -1127,8 +1859,9 @@ class GPIOController:
         self.led_green_pin = led_green_pin  # 绿灯 - 正常
         self.gpio_initialized = False
         
-        # LED 状态
+        # LED 状态和颜色对应的针脚
         self.led_states = {"red": False, "blue": False, "green": False}
+        self._led_pins = {"red": led_red_pin, "blue": led_blue_pin, "green": led_green_pin}
         
         if IS_LINUX:
             try:
@@ -1159,12 +1892,7 @@ class GPIOController:
     
     def _get_pin(self, color: str) -> int:
         """获取颜色对应的GPIO针脚"""
-        pin_map = {
-            "red": self.led_red_pin,
-            "blue": self.led_blue_pin,
-            "green": self.led_green_pin
-        }
-        return pin_map.get(color, self.led_green_pin)
+        return self._led_pins.get(color, self.led_green_pin)
     
     def turn_on_led(self, color: str):
         """打开指定颜色的 LED"""
@@ -1195,29 +1923,10 @@ class GPIOController:
         if not self.gpio_initialized:
             return
         
-        # 红灯
-        if red and not self.led_states["red"]:
-            self.GPIO.output(self.led_red_pin, self.GPIO.HIGH)
-            self.led_states["red"] = True
-        elif not red and self.led_states["red"]:
-            self.GPIO.output(self.led_red_pin, self.GPIO.LOW)
-            self.led_states["red"] = False
-        
-        # 蓝灯
-        if blue and not self.led_states["blue"]:
-            self.GPIO.output(self.led_blue_pin, self.GPIO.HIGH)
-            self.led_states["blue"] = True
-        elif not blue and self.led_states["blue"]:
-            self.GPIO.output(self.led_blue_pin, self.GPIO.LOW)
-            self.led_states["blue"] = False
-        
-        # 绿灯
-        if green and not self.led_states["green"]:
-            self.GPIO.output(self.led_green_pin, self.GPIO.HIGH)
-            self.led_states["green"] = True
-        elif not green and self.led_states["green"]:
-            self.GPIO.output(self.led_green_pin, self.GPIO.LOW)
-            self.led_states["green"] = False
+        for color, desired in (("red", red), ("blue", blue), ("green", green)):
+            if desired != self.led_states[color]:
+                self.GPIO.output(self._led_pins[color], self.GPIO.HIGH if desired else self.GPIO.LOW)
+                self.led_states[color] = desired
     
     def buzzer_beep(self, duration: float = 0.5):
         """蜂鸣器响（USB蜂鸣器通过系统声音）"""
@@ -1240,6 +1949,83 @@ class GPIOController:
             print("✓ GPIO资源已清理")
 
 
+# ==================== 摄像头采集线程 ====================
+class CameraThread:
+    """
+    摄像头采集线程
+    
+    采集和颜色转换在独立线程中进行，与主线程的绘制/显示重叠。
+    每帧都是新分配的数组，发布后不再修改，读取方直接引用即可，无需拷贝。
+    """
+    
+    def __init__(self, read_func: Callable[[], Optional[np.ndarray]]):
+        """
+        Args:
+            read_func: 读取一帧BGR图像的函数，失败时返回 None
+        """
+        self._read_func = read_func
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_id = 0
+        self._failed = False
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        """启动采集线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止采集线程"""
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+    
+    def _worker(self):
+        """采集循环"""
+        if set_thread_nice(CAPTURE_NICE):
+            print(f"✓ 采集线程 nice 值已调整 {CAPTURE_NICE}")
+        
+        while self._running:
+            try:
+                frame = self._read_func()
+            except Exception as e:
+                print(f"摄像头采集错误: {e}")
+                frame = None
+            
+            with self._cond:
+                if frame is None:
+                    self._failed = True
+                    self._cond.notify_all()
+                    return
+                self._frame = frame
+                self._frame_id += 1
+                self._cond.notify_all()
+            
+            # 第一帧转换完成后再绑核（不让 OpenCV 线程池继承单核亲和性）
+            if self._frame_id == 1 and set_thread_affinity(CAPTURE_CPU_CORES):
+                print(f"✓ 采集线程已绑定到CPU核心 {sorted(CAPTURE_CPU_CORES)}")
+    
+    @property
+    def frame_count(self) -> int:
+        """已采集的帧数（即最新帧的序号）"""
+        return self._frame_id
+    
+    def read(self, last_id: int = 0, timeout: float = 2.0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        等待比 last_id 更新的一帧
+        Returns:
+            (帧序号, 帧) - 采集失败或超时时帧为 None
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_id != last_id or self._failed, timeout)
+            if self._failed or self._frame_id == last_id:
+                return last_id, None
+            return self._frame_id, self._frame
+
+
 # ==================== 统一检测系统 ====================
 class UnifiedDetectionSystem:
     """
@@ -1257,6 +2043,9 @@ class UnifiedDetectionSystem:
     def __init__(self, camera_id: int = 0):
         self.camera_id = camera_id
         self.cap = None
+        self.camera = None  # 摄像头采集线程
+        # 各消费线程错过的帧数（采集线程只保留最新一帧，处理慢于采集时旧帧被新帧覆盖）
+        self.frames_missed = {"detection": 0, "display": 0}
         
         # 当前模式
         self.current_mode = DetectionMode.ZONE
@@ -1278,8 +2067,8 @@ class UnifiedDetectionSystem:
         self.dht_sensor = DHT11Sensor(pin=4)
         
         # 传感器数据上报间隔
-        self.last_sensor_report_time = 0
         self.sensor_report_interval = 5.0  # 每5秒上报一次
+        self._last_sensor_sent = None      # (温度, 湿度, 上报时间)，读数未变化时跳过上报
         
         # ========== 环境阈值设置 ==========
         self.temp_max = 35.0      # 温度上限 (°C)
@@ -1304,18 +2093,44 @@ class UnifiedDetectionSystem:
         self.running = False
         
         # 模式检查间隔
-        self.last_mode_check = 0
         self.mode_check_interval = 1.0  # 每秒检查一次
+        self.threshold_check_interval = 5.0  # 环境阈值每5秒检查一次
+        self._periodic_thread = None    # 周期任务线程（模式检查、阈值更新、传感器上报）
         
         # ========== 异步检测相关 ==========
-        # 用于线程间共享的帧和检测结果
-        self._frame_lock = threading.Lock()
-        self._result_lock = threading.Lock()
-        self._latest_frame = None           # 最新的摄像头帧
+        # 检测线程是唯一写入方，每次整体替换为新的结果字典（发布后不再修改），
+        # 引用赋值是原子的，读取方直接取引用即可，无需加锁
         self._latest_result = None          # 最新的检测结果
-        self._latest_processed_frame = None # 最新的处理后帧（带标注）
+        self._overlay_layers = None         # 叠加层的区域静态图层
+        self._overlay_key = None            # (h, w, 区域版本)，变化时重建
+        self._draw_buf = None               # 叠加层输出缓冲区（复用，避免每帧分配）
+        
+        # 叠加层固定文字预渲染
+        self._area_label = TextSprite.render("Detection Area", 0.5, (100, 100, 100), 1)
+        self._product_mode_label = TextSprite.render("[PRODUCT MODE - ASYNC]", 0.6, (255, 150, 50), 2)
+        self._hint_label = TextSprite.render("1:Zone 2:Product c:Capture r:Reset q:Quit", 0.5, (200, 200, 200), 1)
+        self._footer_sprite = None          # ((FPS文字, 帧高), 底部FPS+操作提示合成图块)，FPS 每10帧才变化一次
+        
+        # ========== 后台任务队列 ==========
+        # 上报和提示音各用一个常驻线程处理，不再每次事件新建线程；队列满时丢弃
+        self._report_queue = queue.Queue(maxsize=64)
+        self._sound_queue = queue.Queue(maxsize=8)
+        for task_queue in (self._report_queue, self._sound_queue):
+            threading.Thread(target=self._task_worker, args=(task_queue,), daemon=True).start()
         self._detection_thread = None       # 检测线程
         self._detection_running = False     # 检测线程运行标志
+        self._capture_requested = False     # 手动捕获请求，由检测线程在下一帧处理
+        self._reset_requested = None        # 重置请求（对应的检测模式），由检测线程处理，保持检测器状态单线程写入
+        
+        # 按键分发表（每帧一次字典查找，替代逐个比较）
+        self._key_handlers = {
+            ord('q'): self._on_quit,
+            ord('1'): lambda: self.set_mode(DetectionMode.ZONE),
+            ord('2'): lambda: self.set_mode(DetectionMode.PRODUCT),
+            ord('c'): self._on_capture,
+            ord('r'): self._on_reset,
+            ord('s'): self._print_statistics,
+        }
     
     def init_detectors(self):
         """初始化检测器"""
@@ -1338,7 +2153,11 @@ class UnifiedDetectionSystem:
             except Exception as e:
                 print(f"⚠️ 模型优化失败: {e}")
 
-        if os.path.exists("yolov8n_ncnn_model"):
+        # INT8 模型由 export_int8.py 生成，仅在支持点积指令的CPU上使用
+        if os.path.exists("yolov8n_ncnn_int8_model") and cpu_supports_int8_dot():
+            model_path = "yolov8n_ncnn_int8_model"
+            print("✓ 使用 NCNN INT8 量化模型（SDOT/UDOT 加速）")
+        elif os.path.exists("yolov8n_ncnn_model"):
             model_path = "yolov8n_ncnn_model"
             print("✓ 使用 NCNN 格式模型（ARM架构优化）")
         else:
@@ -1385,6 +2204,24 @@ class UnifiedDetectionSystem:
         print("✓ 所有检测器初始化完成")
         print("✓ 人员状态追踪已启用（进入/离开危险区域）")
     
+    @staticmethod
+    def _submit(task_queue: queue.Queue, task: Callable[[], None]):
+        """提交后台任务（非阻塞，队列满时丢弃）"""
+        try:
+            task_queue.put_nowait(task)
+        except queue.Full:
+            pass
+    
+    @staticmethod
+    def _task_worker(task_queue: queue.Queue):
+        """后台任务线程：依次执行队列中的任务"""
+        while True:
+            task = task_queue.get()
+            try:
+                task()
+            except Exception as e:
+                print(f"后台任务错误: {e}")
+    
     def _on_zone_enter(self, alert: AlertInfo):
         """人员进入危险区域回调"""
         print(f"\n🚨 {alert.timestamp} - {alert.message}")
@@ -1398,20 +2235,20 @@ class UnifiedDetectionSystem:
                 winsound.Beep(1000, 500)  # 高频报警
             elif IS_LINUX:
                 self.gpio.buzzer_beep(0.5)
-        threading.Thread(target=_alarm, daemon=True).start()
+        self._submit(self._sound_queue, _alarm)
         
         # 更新LED状态（蓝灯亮表示危险区域有人）
         self._update_led_status()
         
         # 上报到服务器
         if self.server:
-            def _report():
-                self.server.report_zone_event(
-                    event_type="enter",
-                    statistics=self.zone_detector.get_statistics(),
-                    message=alert.message
-                )
-            threading.Thread(target=_report, daemon=True).start()
+            statistics = self.zone_detector.get_statistics()
+            self._submit(self._report_queue, lambda: self.server.report_zone_event(
+                event_type="enter",
+                statistics=statistics,
+                message=alert.message,
+                timestamp=alert.iso_timestamp
+            ))
     
     def _on_zone_exit(self, alert: AlertInfo):
         """人员离开危险区域回调"""
@@ -1426,20 +2263,20 @@ class UnifiedDetectionSystem:
                 winsound.Beep(500, 200)
             elif IS_LINUX:
                 self.gpio.buzzer_beep(0.2)
-        threading.Thread(target=_notify, daemon=True).start()
+        self._submit(self._sound_queue, _notify)
         
         # 更新LED状态（如果危险区域没人了，蓝灯灭）
         self._update_led_status()
         
         # 上报到服务器
         if self.server:
-            def _report():
-                self.server.report_zone_event(
-                    event_type="exit",
-                    statistics=self.zone_detector.get_statistics(),
-                    message=alert.message
-                )
-            threading.Thread(target=_report, daemon=True).start()
+            statistics = self.zone_detector.get_statistics()
+            self._submit(self._report_queue, lambda: self.server.report_zone_event(
+                event_type="exit",
+                statistics=statistics,
+                message=alert.message,
+                timestamp=alert.iso_timestamp
+            ))
     
     def set_mode(self, mode: DetectionMode):
         """设置检测模式"""
@@ -1454,48 +2291,62 @@ class UnifiedDetectionSystem:
         with self.mode_lock:
             return self.current_mode
     
+    def _periodic_worker(self):
+        """
+        周期任务线程
+        模式检查、阈值更新（阻塞的HTTP请求）和传感器上报按各自的截止时间调度，
+        线程在最近的截止时间前休眠，主循环每帧不再做时间判断
+        """
+        tasks = [
+            [0.0, self.mode_check_interval, self._check_mode_from_server],
+            [0.0, self.threshold_check_interval, self._update_thresholds_from_server],
+            [0.0, self.sensor_report_interval, self._report_sensor_data],
+        ]
+        while self.running:
+            for task in tasks:
+                now = time.monotonic()
+                if now >= task[0]:
+                    task[0] = now + task[1]
+                    try:
+                        task[2]()
+                    except Exception as e:
+                        print(f"周期任务错误: {e}")
+            
+            next_due = min(task[0] for task in tasks)
+            time.sleep(min(max(0.0, next_due - time.monotonic()), 0.5))
+    
     def _check_mode_from_server(self):
         """从服务器检查模式"""
-        current_time = time.time()
-        if current_time - self.last_mode_check >= self.mode_check_interval:
-            self.last_mode_check = current_time
-            if self.server:
-                new_mode = self.server.get_detection_mode()
-                self.set_mode(new_mode)
+        if self.server:
+            new_mode = self.server.get_detection_mode()
+            self.set_mode(new_mode)
     
     def _update_thresholds_from_server(self):
         """从服务器更新环境阈值"""
-        if not hasattr(self, 'last_threshold_check'):
-            self.last_threshold_check = 0
-            self.threshold_check_interval = 5  # 每10秒检查一次（加快响应）
-        
-        current_time = time.time()
-        if current_time - self.last_threshold_check >= self.threshold_check_interval:
-            self.last_threshold_check = current_time
-            if self.server:
-                try:
-                    response = requests.get(
-                        f"{self.server.server_url}/api/thresholds/{DEVICE_ID}",
-                        timeout=2
-                    )
-                    if response.status_code == 200:
-                        thresholds = response.json()
-                        old_values = (self.temp_min, self.temp_max, self.humidity_min, self.humidity_max)
-                        
-                        self.temp_min = float(thresholds.get('tempMin', self.temp_min))
-                        self.temp_max = float(thresholds.get('tempMax', self.temp_max))
-                        self.humidity_min = float(thresholds.get('humidityMin', self.humidity_min))
-                        self.humidity_max = float(thresholds.get('humidityMax', self.humidity_max))
-                        self.pressure_min = float(thresholds.get('pressureMin', self.pressure_min))
-                        self.pressure_max = float(thresholds.get('pressureMax', self.pressure_max))
-                        
-                        new_values = (self.temp_min, self.temp_max, self.humidity_min, self.humidity_max)
-                        if old_values != new_values:
-                            print(f"🔧 阈值已更新: 温度{self.temp_min}-{self.temp_max}°C, 湿度{self.humidity_min}-{self.humidity_max}%")
-                            # 阈值更新后立即重新检查环境状态
-                            self._force_env_check = True
-                except Exception as e:
-                    pass  # 静默失败，使用默认阈值
+        if self.server:
+            try:
+                response = self.server.session.get(
+                    f"{self.server.server_url}/api/thresholds/{DEVICE_ID}",
+                    timeout=2
+                )
+                if response.status_code == 200:
+                    thresholds = response.json()
+                    old_values = (self.temp_min, self.temp_max, self.humidity_min, self.humidity_max)
+                    
+                    self.temp_min = float(thresholds.get('tempMin', self.temp_min))
+                    self.temp_max = float(thresholds.get('tempMax', self.temp_max))
+                    self.humidity_min = float(thresholds.get('humidityMin', self.humidity_min))
+                    self.humidity_max = float(thresholds.get('humidityMax', self.humidity_max))
+                    self.pressure_min = float(thresholds.get('pressureMin', self.pressure_min))
+                    self.pressure_max = float(thresholds.get('pressureMax', self.pressure_max))
+                    
+                    new_values = (self.temp_min, self.temp_max, self.humidity_min, self.humidity_max)
+                    if old_values != new_values:
+                        print(f"🔧 阈值已更新: 温度{self.temp_min}-{self.temp_max}°C, 湿度{self.humidity_min}-{self.humidity_max}%")
+                        # 阈值更新后立即重新检查环境状态
+                        self._force_env_check = True
+            except Exception as e:
+                pass  # 静默失败，使用默认阈值
     
     def _check_env_abnormal(self, temperature: float, humidity: float, pressure: float) -> bool:
         """
@@ -1504,37 +2355,25 @@ class UnifiedDetectionSystem:
             True: 环境异常（任一指标超标）
             False: 环境正常
         """
-        abnormal = False
-        reasons = []
+        # 常见情况：全部正常，直接返回，不构造原因字符串
+        if (self.temp_min <= temperature <= self.temp_max
+                and self.humidity_min <= humidity <= self.humidity_max
+                and self.pressure_min <= pressure <= self.pressure_max):
+            return False
         
-        # 检查温度
-        if temperature < self.temp_min:
-            abnormal = True
-            reasons.append(f"温度过低({temperature:.1f}°C < {self.temp_min}°C)")
-        elif temperature > self.temp_max:
-            abnormal = True
-            reasons.append(f"温度过高({temperature:.1f}°C > {self.temp_max}°C)")
-        
-        # 检查湿度
-        if humidity < self.humidity_min:
-            abnormal = True
-            reasons.append(f"湿度过低({humidity:.1f}% < {self.humidity_min}%)")
-        elif humidity > self.humidity_max:
-            abnormal = True
-            reasons.append(f"湿度过高({humidity:.1f}% > {self.humidity_max}%)")
-        
-        # 检查压力
-        if pressure < self.pressure_min:
-            abnormal = True
-            reasons.append(f"压力过低({pressure:.1f}kPa < {self.pressure_min}kPa)")
-        elif pressure > self.pressure_max:
-            abnormal = True
-            reasons.append(f"压力过高({pressure:.1f}kPa > {self.pressure_max}kPa)")
-        
-        if abnormal and reasons:
-            print(f"⚠️ 环境异常: {', '.join(reasons)}")
-        
-        return abnormal
+        # 异常时才按表生成原因
+        reasons = []
+        for name, value, low, high, unit in (
+                ("温度", temperature, self.temp_min, self.temp_max, "°C"),
+                ("湿度", humidity, self.humidity_min, self.humidity_max, "%"),
+                ("压力", pressure, self.pressure_min, self.pressure_max, "kPa")):
+            if value < low:
+                reasons.append(f"{name}过低({value:.1f}{unit} < {low}{unit})")
+            elif value > high:
+                reasons.append(f"{name}过高({value:.1f}{unit} > {high}{unit})")
+        
+        print(f"⚠️ 环境异常: {', '.join(reasons)}")
+        return True
     
     def _update_led_status(self):
         """
@@ -1559,17 +2398,10 @@ class UnifiedDetectionSystem:
     
     def _report_sensor_data(self):
         """上报温湿度传感器数据并检查环境状态"""
-        current_time = time.time()
-        if current_time - self.last_sensor_report_time < self.sensor_report_interval:
-            return
-        
-        self.last_sensor_report_time = current_time
-        
-        # 读取温湿度
-        temperature, humidity = self.dht_sensor.read()
+        # 读取温湿度（后台线程的最新结果，不阻塞主循环）
+        temperature, humidity = self.dht_sensor.get_latest()
         
         # 生成模拟压力值（基于温度微小波动）
-        import random
         self.simulated_pressure = 101.3 + random.uniform(-2, 2)
         pressure = self.simulated_pressure
         
@@ -1589,51 +2421,29 @@ class UnifiedDetectionSystem:
             if old_env_abnormal != self.env_abnormal or force_check:
                 if self.env_abnormal:
                     print("🔴 环境异常，红灯亮起")
-                    self.gpio.buzzer_beep(0.3)  # 短促警报
+                    self._submit(self._sound_queue, lambda: self.gpio.buzzer_beep(0.3))  # 短促警报
                 else:
                     print("🟢 环境恢复正常")
                 self._update_led_status()
             
-            # 上报到服务器
-            if self.server:
-                def _report():
-                    try:
-                        # 上报温度
-                        requests.post(
-                            f"{self.server.server_url}/api/sensor",
-                            json={
-                                "device_id": DEVICE_ID,
-                                "sensor_type": "temperature",
-                                "value": temperature,
-                                "unit": "°C"
-                            },
-                            timeout=2
-                        )
-                        # 上报湿度
-                        requests.post(
-                            f"{self.server.server_url}/api/sensor",
-                            json={
-                                "device_id": DEVICE_ID,
-                                "sensor_type": "humidity",
-                                "value": humidity,
-                                "unit": "%"
-                            },
-                            timeout=2
-                        )
-                        # 上报压力（模拟值）
-                        requests.post(
-                            f"{self.server.server_url}/api/sensor",
-                            json={
-                                "device_id": DEVICE_ID,
-                                "sensor_type": "pressure",
-                                "value": pressure,
-                                "unit": "kPa"
-                            },
-                            timeout=2
-                        )
-                    except Exception:
-                        pass
-                threading.Thread(target=_report, daemon=True).start()
+            # 上报到服务器（三种读数合并为一次请求，读数无明显变化时只按心跳间隔上报）
+            if self.server and self._sensor_changed(temperature, humidity):
+                self._last_sensor_sent = (temperature, humidity, time.monotonic())
+                readings = [
+                    {"sensor_type": "temperature", "value": temperature, "unit": "°C"},
+                    {"sensor_type": "humidity", "value": humidity, "unit": "%"},
+                    {"sensor_type": "pressure", "value": pressure, "unit": "kPa"},  # 模拟值
+                ]
+                self._submit(self._report_queue, lambda: self.server.report_sensor_batch(readings))
+    
+    def _sensor_changed(self, temperature: float, humidity: float) -> bool:
+        """温湿度相对上次上报是否有明显变化（或已超过心跳间隔）"""
+        if self._last_sensor_sent is None:
+            return True
+        last_temp, last_humidity, last_time = self._last_sensor_sent
+        return (abs(temperature - last_temp) > SENSOR_REPORT_TEMP_DELTA
+                or abs(humidity - last_humidity) > SENSOR_REPORT_HUMIDITY_DELTA
+                or time.monotonic() - last_time >= SENSOR_REPORT_MAX_INTERVAL)
     
     def _stream_frame(self, frame: np.ndarray, detection_info: dict):
         """推送视频帧"""
@@ -1641,9 +2451,10 @@ class UnifiedDetectionSystem:
         if current_time - self.last_stream_time >= self.stream_interval:
             self.last_stream_time = current_time
             if self.server:
-                def _send():
-                    self.server.send_video_frame(frame, detection_info)
-                threading.Thread(target=_send, daemon=True).start()
+                self.server.send_video_frame(frame, detection_info)
+                # 发送线程持有该帧，下一帧不能再复用这块缓冲区
+                if frame is self._draw_buf:
+                    self._draw_buf = None
     
     def _report_detection(self, detection_info: dict):
         """上报检测结果"""
@@ -1653,18 +2464,14 @@ class UnifiedDetectionSystem:
         mode = detection_info.get("mode", "zone")
         
         if mode == "zone" and detection_info.get("alert_triggered"):
-            def _report():
-                self.server.report_detection(
-                    detection_info.get("person_count", 0),
-                    detection_info.get("in_danger_zone", False),
-                    detection_info.get("alert_triggered", False)
-                )
-            threading.Thread(target=_report, daemon=True).start()
+            self._submit(self._report_queue, lambda: self.server.report_detection(
+                detection_info.get("person_count", 0),
+                detection_info.get("in_danger_zone", False),
+                detection_info.get("alert_triggered", False)
+            ))
         
         elif mode == "product" and detection_info.get("is_new"):
-            def _report():
-                self.server.report_product(detection_info)
-            threading.Thread(target=_report, daemon=True).start()
+            self._submit(self._report_queue, lambda: self.server.report_product(detection_info))
     
     def _detection_worker(self):
         """
@@ -1672,28 +2479,67 @@ class UnifiedDetectionSystem:
         独立运行YOLO检测，不阻塞主线程的画面显示
         """
         print("🔄 异步检测线程已启动")
+        if set_thread_realtime(DETECTION_RT_PRIORITY):
+            print(f"✓ 检测线程已启用实时调度 (SCHED_FIFO {DETECTION_RT_PRIORITY})")
         
+        frame_id = 0
+        last_detect_id = -DETECT_EVERY_N_FRAMES  # 上次执行推理的帧序号
+        prev_gray = None        # 上次执行检测时的缩小灰度图
+        last_detect_time = 0
         while self._detection_running:
-            # 获取最新帧
-            with self._frame_lock:
-                if self._latest_frame is None:
-                    time.sleep(0.01)
-                    continue
-                frame = self._latest_frame.copy()
+            # 等待采集线程的新一帧（帧发布后不再修改，直接引用，不拷贝）
+            new_id, frame = self.camera.read(frame_id, timeout=0.5)
+            if frame is None:
+                time.sleep(0.01)
+                continue
+            if frame_id:
+                self.frames_missed["detection"] += new_id - frame_id - 1
+            frame_id = new_id
+            
+            # 处理主线程的重置请求（检测器状态只在本线程修改）
+            reset_mode = self._reset_requested
+            if reset_mode is not None:
+                self._reset_requested = None
+                if reset_mode == DetectionMode.PRODUCT:
+                    self.product_detector.reset_count()
+                else:
+                    self.zone_detector.reset_statistics()
             
             # 执行检测（这是耗时操作）
             current_mode = self.get_mode()
             
+            # 帧步长：推理比摄像头快时也不逐帧推理，给显示和其他线程留出CPU
+            if current_mode == DetectionMode.ZONE:
+                if frame_id - last_detect_id < DETECT_EVERY_N_FRAMES:
+                    continue
+                last_detect_id = frame_id
+            
+            # 运动门控：画面无变化、危险区无人且无待确认状态时跳过推理，沿用上次结果
+            if MOTION_GATE_ENABLED and current_mode == DetectionMode.ZONE:
+                gray = cv2.cvtColor(cv2.resize(frame, (80, 60), interpolation=cv2.INTER_AREA),
+                                    cv2.COLOR_BGR2GRAY)
+                if (prev_gray is not None
+                        and time.time() - last_detect_time < MOTION_FORCE_INTERVAL
+                        and self.zone_detector.statistics.current_in_danger == 0
+                        and self.zone_detector.tracker.is_settled()
+                        and cv2.norm(gray, prev_gray, cv2.NORM_L1) / gray.size < MOTION_THRESHOLD):
+                    continue
+                prev_gray = gray
+                last_detect_time = time.time()
+            
             try:
+                # frame 与主线程共享，只做分析不绘制，标注由主线程叠加到最新帧上
                 if current_mode == DetectionMode.ZONE:
-                    processed_frame, detection_info = self.zone_detector.detect(frame)
+                    _, detection_info = self.zone_detector.detect(frame, draw=False)
                 else:
-                    processed_frame, detection_info = self.product_detector.detect(frame)
+                    # 产品模式只做分析，标注由主线程叠加到最新帧上
+                    detection_info = self.product_detector._analyze(frame)
+                    if self._capture_requested:
+                        self._capture_requested = False
+                        self._manual_capture(detection_info)
                 
-                # 保存检测结果
-                with self._result_lock:
-                    self._latest_result = detection_info
-                    self._latest_processed_frame = processed_frame
+                # 发布检测结果（整体替换引用）
+                self._latest_result = detection_info
                 
                 # 上报检测结果
                 self._report_detection(detection_info)
@@ -1704,99 +2550,118 @@ class UnifiedDetectionSystem:
         
         print("🔄 异步检测线程已停止")
     
-    def _draw_overlay_on_frame(self, frame: np.ndarray) -> np.ndarray:
+    # ==================== 键盘操作 ====================
+    def _on_quit(self):
+        """退出程序"""
+        print("\n正在退出...")
+        self.running = False
+    
+    def _on_capture(self):
+        """手动捕获产品（产品模式下）"""
+        if self.get_mode() == DetectionMode.PRODUCT:
+            # 捕获交给检测线程执行，不阻塞显示，也避免与检测线程同时修改产品检测器状态
+            self._capture_requested = True
+    
+    def _on_reset(self):
+        """重置计数（交给检测线程执行，避免与正在进行的检测同时修改状态）"""
+        self._reset_requested = self.get_mode()
+    
+    def _manual_capture(self, detection_info: dict):
+        """手动捕获产品并上报（在检测线程中调用，使用本帧已有的检测结果）"""
+        result = self.product_detector.capture(detection_info)
+        if result and self.server:
+            self._submit(self._report_queue, lambda: self.server.report_product(result))
+    
+    def _get_footer_sprite(self, fps: float, h: int) -> TextSprite:
+        """获取底部 FPS 和操作提示的合成图块（FPS文字未变化时直接复用）"""
+        key = (f"FPS: {fps:.1f}", h)
+        if self._footer_sprite is None or self._footer_sprite[0] != key:
+            fps_sprite = TextSprite.render(key[0], 0.6, (255, 255, 255), 2)
+            sprite = TextSprite.compose([(fps_sprite, (10, h - 10)), (self._hint_label, (10, h - 35))])
+            self._footer_sprite = (key, sprite)
+        return self._footer_sprite[1]
+    
+    def _get_draw_buffer(self, frame: np.ndarray) -> np.ndarray:
+        """获取叠加层输出缓冲区（尺寸不变且未交给发送线程时复用）"""
+        if self._draw_buf is None or self._draw_buf.shape != frame.shape:
+            self._draw_buf = np.empty_like(frame)
+        return self._draw_buf
+    
+    def _draw_overlay_on_frame(self, frame: np.ndarray, fps: float = 0.0) -> np.ndarray:
         """
         在原始帧上绘制检测结果叠加层
         使用最新的检测结果，但不阻塞等待新检测
+        Args:
+            fps: 显示帧率（与操作提示一起绘制在底部）
         """
         h, w = frame.shape[:2]
-        output = frame.copy()
         
         # 获取最新检测结果
-        with self._result_lock:
-            detection_info = self._latest_result
-            processed_frame = self._latest_processed_frame
+        detection_info = self._latest_result
         
         current_mode = self.get_mode()
         
         if current_mode == DetectionMode.ZONE:
-            # 绘制危险区域和安全区域
-            overlay = output.copy()
-            for zone in self.zone_detector.danger_zones:
-                cv2.fillPoly(overlay, [zone], (0, 0, 200))
-                cv2.polylines(output, [zone], True, (0, 0, 255), 2)
-            for zone in self.zone_detector.safe_zones:
-                cv2.fillPoly(overlay, [zone], (0, 200, 0))
-                cv2.polylines(output, [zone], True, (0, 255, 0), 2)
-            cv2.addWeighted(overlay, 0.3, output, 0.7, 0, output)
-            
-            # 绘制警戒线
-            line_x = int(w * 0.4)
-            cv2.line(output, (line_x, 0), (line_x, h), (0, 255, 255), 2)
-            cv2.putText(output, "WARNING LINE", (line_x + 10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+            # 危险/安全区域、警戒线和模式标识为静态图层，只在区域或分辨率变化时重建，每帧一次混合
+            overlay_key = (h, w, self.zone_detector.zones_version)
+            if self._overlay_key != overlay_key:
+                self._overlay_layers = self.zone_detector.build_static_layers(
+                    h, w, warning_x=int(w * 0.4),
+                    mode_label="[ZONE MODE - ASYNC]", mode_label_x=w - 200
+                )
+                self._overlay_key = overlay_key
+            output = self._overlay_layers.draw(frame, out=self._get_draw_buffer(frame))
             
-            # 绘制检测框（使用缓存的检测结果）
-            for detection in self.zone_detector.last_detections:
-                x1, y1, x2, y2, conf = detection
-                center = self.zone_detector._get_person_center((x1, y1, x2, y2))
-                in_danger = any(self.zone_detector._point_in_zone(center, zone) 
-                               for zone in self.zone_detector.danger_zones)
+            # 绘制检测框和统计信息（使用缓存的检测结果，与检测器共用预渲染图块）
+            detections = self.zone_detector.last_detections
+            self.zone_detector.draw_persons(output, detections)
+            self.zone_detector.draw_hud(output, len(detections))
+        
+        else:
+            # 产品检测模式 - 按最新检测结果在当前帧上绘制
+            if detection_info and detection_info.get("mode") == "product":
+                output = self.product_detector._render(frame, detection_info,
+                                                       out=self._get_draw_buffer(frame))
+            else:
+                output = self._get_draw_buffer(frame)
+                np.copyto(output, frame)
                 
-                if in_danger:
-                    color = (0, 0, 255)
-                    label = "DANGER!"
-                else:
-                    color = (0, 255, 0)
-                    label = "Person"
+                # 绘制检测区域
+                cv2.rectangle(output, (50, 50), (w-50, h-50), (100, 100, 100), 2)
+                self._area_label.blit(output, (55, 45))
                 
-                cv2.rectangle(output, (x1, y1), (x2, y2), color, 2)
-                cv2.putText(output, label, (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
-                cv2.circle(output, center, 4, color, -1)
-            
-            # 显示统计信息
-            stats = self.zone_detector.statistics
-            y_offset = 30
-            
-            if stats.current_in_danger > 0:
-                cv2.putText(output, f"WARNING: {stats.current_in_danger} in DANGER ZONE!", (10, y_offset),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
-                y_offset += 30
-            
-            cv2.putText(output, f"Persons: {len(self.zone_detector.last_detections)}", (10, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            y_offset += 25
-            
-            cv2.putText(output, f"In Danger: {stats.current_in_danger}", (10, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            y_offset += 25
-            
-            cv2.putText(output, f"Entries: {stats.total_entries} | Exits: {stats.total_exits}", (10, y_offset),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 200, 100), 1)
-            
-            cv2.putText(output, "[ZONE MODE - ASYNC]", (w - 200, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+                # 统计信息
+                self.product_detector.draw_counts(output)
+                
+                self._product_mode_label.blit(output, (w - 220, 30))
         
-        else:
-            # 产品检测模式 - 使用处理后的帧（如果有）
-            if processed_frame is not None and detection_info and detection_info.get("mode") == "product":
-                return processed_frame
-            
-            # 绘制检测区域
-            cv2.rectangle(output, (50, 50), (w-50, h-50), (100, 100, 100), 2)
-            cv2.putText(output, "Detection Area", (55, 45), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (100, 100, 100), 1)
-            
-            # 统计信息
-            cv2.putText(output, f"Product A: {self.product_detector.detection_count['product_a']}", (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.product_detector.COLOR_RANGES["blue"]["display_color"], 2)
-            cv2.putText(output, f"Product B: {self.product_detector.detection_count['product_b']}", (10, 55),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, self.product_detector.COLOR_RANGES["cyan"]["display_color"], 2)
-            
-            cv2.putText(output, "[PRODUCT MODE - ASYNC]", (w - 220, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 150, 50), 2)
+        # FPS 和操作提示（一次拷贝）
+        self._get_footer_sprite(fps, h).blit(output, (0, 0))
         
         return output
     
+    def _read_camera_frame(self) -> Optional[np.ndarray]:
+        """读取一帧BGR图像（在采集线程中调用）- 支持 picamera2 和 OpenCV"""
+        if self.use_picamera2:
+            if PICAMERA2_YUV420:
+                # 直接映射请求的缓冲区，I420 平面数据 (H*3/2, 行跨度) 一次转换为 BGR，
+                # 省去 capture_array 先整帧拷出的一次拷贝
+                request = self.picam2.capture_request()
+                try:
+                    with MappedArray(request, "main") as m:
+                        frame = cv2.cvtColor(m.array, cv2.COLOR_YUV2BGR_I420)
+                finally:
+                    request.release()
+                if frame.shape[1] != CAMERA_WIDTH:
+                    # 去掉行对齐填充
+                    frame = np.ascontiguousarray(frame[:, :CAMERA_WIDTH])
+                return frame
+            # RGB888 的内存顺序已是 BGR（OpenCV格式），capture_array 返回的拷贝可直接使用
+            return self.picam2.capture_array()
+        
+        ret, frame = self.cap.read()
+        return frame if ret else None
+    
     def run(self, headless: bool = False):
         """运行检测系统"""
         # 初始化检测器
@@ -1811,8 +2676,11 @@ class UnifiedDetectionSystem:
             try:
                 print("尝试使用 picamera2 打开摄像头...")
                 self.picam2 = Picamera2()
+                camera_format = "YUV420" if PICAMERA2_YUV420 else "RGB888"
+                # queue=False：capture_array 总是返回请求之后完成的新帧，不会拿到积压的旧帧
                 config = self.picam2.create_preview_configuration(
-                    main={"size": (CAMERA_WIDTH, CAMERA_HEIGHT), "format": "RGB888"}
+                    main={"size": (CAMERA_WIDTH, CAMERA_HEIGHT), "format": camera_format},
+                    queue=False
                 )
                 self.picam2.configure(config)
                 self.picam2.start()
@@ -1843,6 +2711,8 @@ class UnifiedDetectionSystem:
                         print("✓ 直接打开摄像头成功")
                 
                 if camera_opened:
+                    # USB摄像头优先输出MJPEG（压缩帧，USB带宽占用小），需在设置分辨率之前设置
+                    self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
                     self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, CAMERA_WIDTH)
                     self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, CAMERA_HEIGHT)
                     self.cap.set(cv2.CAP_PROP_FPS, 30)
@@ -1887,12 +2757,24 @@ class UnifiedDetectionSystem:
         if not headless:
             cv2.namedWindow(window_name)
         
+        # ========== 启动摄像头采集线程 ==========
+        self.camera = CameraThread(self._read_camera_frame)
+        self.camera.start()
+        frame_id = 0
+        
+        # 温湿度在后台线程读取
+        self.dht_sensor.start()
+        
         # ========== 启动异步检测线程 ==========
         self._detection_running = True
         self._detection_thread = threading.Thread(target=self._detection_worker, daemon=True)
         self._detection_thread.start()
         print("✓ 异步检测模式已启用（画面流畅，检测独立运行）")
         
+        # ========== 启动周期任务线程（模式检查、阈值更新、传感器上报） ==========
+        self._periodic_thread = threading.Thread(target=self._periodic_worker, daemon=True)
+        self._periodic_thread.start()
+        
         # 启动时初始化LED状态（绿灯亮表示系统正常）
         self.gpio.set_led_state(red=False, blue=False, green=True)
         print("✓ LED状态已初始化（绿灯亮 = 系统正常）")
@@ -1900,44 +2782,25 @@ class UnifiedDetectionSystem:
         fps_start_time = time.time()
         fps_frame_count = 0
         fps = 0
+        render_pinned = False
         
         try:
             while self.running:
-                # 读取帧 - 支持 picamera2 和 OpenCV
-                if self.use_picamera2:
-                    frame = self.picam2.capture_array()
-                    # picamera2 返回 RGB，需要转换为 BGR（OpenCV格式）
-                    frame = cv2.cvtColor(frame, cv2.COLOR_RGB2BGR)
-                    ret = True
-                else:
-                    ret, frame = self.cap.read()
+                # 等待采集线程的新一帧
+                new_id, frame = self.camera.read(frame_id)
                 
-                if not ret or frame is None:
+                if frame is None:
                     print("错误：无法读取帧")
                     break
+                if frame_id:
+                    self.frames_missed["display"] += new_id - frame_id - 1
+                frame_id = new_id
                 
-                # 更新最新帧供检测线程使用
-                with self._frame_lock:
-                    self._latest_frame = frame.copy()
-                
-                # 检查服务器模式（低频率）
-                self._check_mode_from_server()
-                
-                # 更新环境阈值（每30秒一次）
-                self._update_thresholds_from_server()
-                
-                # 上报温湿度传感器数据（每5秒一次）
-                self._report_sensor_data()
-                
-                # 在原始帧上绘制检测结果叠加层（不阻塞）
-                display_frame = self._draw_overlay_on_frame(frame)
-                
-                # 推送视频流
-                if ENABLE_VIDEO_STREAM:
-                    with self._result_lock:
-                        detection_info = self._latest_result
-                    if detection_info:
-                        self._stream_frame(display_frame, detection_info)
+                # 收到第一帧时采集线程已完成首次转换，此时主线程再绑核
+                if not render_pinned:
+                    render_pinned = True
+                    if set_thread_affinity(RENDER_CPU_CORES):
+                        print(f"✓ 显示线程已绑定到CPU核心 {sorted(RENDER_CPU_CORES)}")
                 
                 # 计算FPS
                 fps_frame_count += 1
@@ -1946,39 +2809,23 @@ class UnifiedDetectionSystem:
                     fps_start_time = time.time()
                     fps_frame_count = 0
                 
-                cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, CAMERA_HEIGHT - 10),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                # 在原始帧上绘制检测结果叠加层、FPS和操作提示（不阻塞）
+                display_frame = self._draw_overlay_on_frame(frame, fps)
                 
-                # 显示操作提示
-                cv2.putText(display_frame, "1:Zone 2:Product c:Capture r:Reset q:Quit",
-                           (10, CAMERA_HEIGHT - 35), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+                # 推送视频流（帧交给发送线程后不再修改）
+                if ENABLE_VIDEO_STREAM:
+                    detection_info = self._latest_result
+                    if detection_info:
+                        self._stream_frame(display_frame, detection_info)
                 
                 if not headless:
                     cv2.imshow(window_name, display_frame)
-                    key = cv2.waitKey(1) & 0xFF
-                    
-                    if key == ord('q'):
-                        print("\n正在退出...")
-                        break
-                    elif key == ord('1'):
-                        self.set_mode(DetectionMode.ZONE)
-                    elif key == ord('2'):
-                        self.set_mode(DetectionMode.PRODUCT)
-                    elif key == ord('c') and self.get_mode() == DetectionMode.PRODUCT:
-                        result = self.product_detector.capture(frame)
-                        if result and self.server:
-                            self.server.report_product(result)
-                    elif key == ord('r'):
-                        # 重置计数
-                        if self.get_mode() == DetectionMode.PRODUCT:
-                            self.product_detector.reset_count()
-                        else:
-                            self.zone_detector.reset_statistics()
-                    elif key == ord('s'):
-                        # 显示统计信息
-                        self._print_statistics()
-                else:
-                    time.sleep(0.01)
+                    # pollKey 只处理窗口事件，不像 waitKey(1) 那样每帧至少休眠1毫秒
+                    key = cv2.pollKey() & 0xFF
+                    handler = self._key_handlers.get(key)
+                    if handler:
+                        handler()
+                # 无界面模式不需要额外休眠：camera.read 会等待下一帧，循环节奏与摄像头帧率一致
                     
         except KeyboardInterrupt:
             print("\n\n收到中断信号，正在退出...")
@@ -1991,7 +2838,13 @@ class UnifiedDetectionSystem:
                 self._detection_thread.join(timeout=2.0)
                 print("✓ 检测线程已停止")
             
-            # 释放摄像头资源
+            # 停止周期任务线程（阈值请求最长阻塞2秒）
+            if self._periodic_thread and self._periodic_thread.is_alive():
+                self._periodic_thread.join(timeout=3.0)
+            
+            # 停止采集线程并释放摄像头资源
+            if self.camera:
+                self.camera.stop()
             if self.use_picamera2 and self.picam2:
                 self.picam2.stop()
                 print("✓ picamera2 已停止")
@@ -2023,6 +2876,13 @@ class UnifiedDetectionSystem:
         print(f"\n📦 产品检测统计:")
         print(f"  产品A: {self.product_detector.detection_count['product_a']}")
         print(f"  产品B: {self.product_detector.detection_count['product_b']}")
+        
+        # 帧处理统计（错过帧数持续增长说明该线程跟不上采集速度）
+        if self.camera:
+            print("\n🎞️ 帧统计:")
+            print(f"  已采集: {self.camera.frame_count}")
+            print(f"  检测线程错过: {self.frames_missed['detection']}")
+            print(f"  显示线程错过: {self.frames_missed['display']}")
         print("="*50)
 
 
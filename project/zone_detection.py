@@ -9,20 +9,34 @@ YOLOv8 区域检测系统 - 树莓派/Windows 跨平台版
 特性：无需交互，启动后自动运行，预设危险区域为屏幕右半部分
 """
 
+import os
+
+# ==================== 线程配置 ====================
+# OpenCV、PyTorch/NCNN/ONNX Runtime 默认都按CPU核数开线程池，4核树莓派上会互相抢占
+# 推理独占 核数-1 个线程，留一个核给采集/绘制/编码线程；OpenCV 只在调用线程内执行
+INFERENCE_THREADS = max(1, (os.cpu_count() or 4) - 1)
+# 必须在导入 numpy / torch 之前设置才会生效
+os.environ.setdefault("OMP_NUM_THREADS", str(INFERENCE_THREADS))
+os.environ.setdefault("MKL_NUM_THREADS", str(INFERENCE_THREADS))
+os.environ.setdefault("OPENBLAS_NUM_THREADS", "1")
+
 import cv2
 import numpy as np
 from ultralytics import YOLO
+import torch
 from datetime import datetime
 from dataclasses import dataclass
 from typing import List, Tuple, Callable, Optional
 import time
 import threading
+import queue
 import platform
 import subprocess
-import base64
 import json
-import asyncio
-import aiohttp
+import wave
+
+cv2.setNumThreads(1)
+torch.set_num_threads(INFERENCE_THREADS)
 
 # 检测操作系统
 IS_WINDOWS = platform.system() == "Windows"
@@ -31,6 +45,39 @@ IS_LINUX = platform.system() == "Linux"
 if IS_WINDOWS:
     import winsound
 
+# 尝试导入 ncnn（直接调用NCNN推理，跳过Ultralytics的Python前后处理）
+NCNN_AVAILABLE = False
+try:
+    import ncnn
+    NCNN_AVAILABLE = True
+except ImportError:
+    print("⚠️ ncnn 不可用，将使用 Ultralytics 推理")
+
+# 尝试导入 onnxruntime（直接调用ONNX Runtime推理，开启全部图优化）
+ONNXRUNTIME_AVAILABLE = False
+try:
+    import onnxruntime as ort
+    ONNXRUNTIME_AVAILABLE = True
+except ImportError:
+    print("⚠️ onnxruntime 不可用，ONNX 模型将通过 Ultralytics 推理")
+
+# 尝试导入 pyalsaaudio（报警音复用同一个ALSA播放句柄，不再每次启动 aplay 进程）
+ALSAAUDIO_AVAILABLE = False
+if IS_LINUX:
+    try:
+        import alsaaudio
+        ALSAAUDIO_AVAILABLE = True
+    except ImportError:
+        print("⚠️ pyalsaaudio 不可用，报警音使用 aplay 播放")
+
+# 尝试导入 PyTurboJPEG（直接调用 libjpeg-turbo 的 NEON/SIMD 编码）
+TURBOJPEG_AVAILABLE = False
+try:
+    from turbojpeg import TurboJPEG, TJPF_BGR, TJSAMP_420
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    print("⚠️ PyTurboJPEG 不可用，视频帧使用 OpenCV 编码")
+
 # ==================== 服务器配置 ====================
 SERVER_URL = "http://localhost:8000"  # 后端服务器地址
 DEVICE_ID = "device_001"              # 设备ID
@@ -39,6 +86,91 @@ ENABLE_VIDEO_STREAM = True            # 是否启用视频流推送
 VIDEO_STREAM_FPS = 10                 # 视频流帧率（降低以减少带宽）
 VIDEO_QUALITY = 50                    # JPEG压缩质量（1-100）
 
+# ==================== 自适应跳帧配置 ====================
+ADAPTIVE_SKIP_ENABLED = True          # 按画面变化动态决定推理间隔（关闭时使用固定 frame_skip）
+MOTION_STATIC_THRESHOLD = 2.0         # 80x60灰度图与上次推理帧的平均灰度差，低于此值视为静止，不推理
+MOTION_BUSY_THRESHOLD = 8.0           # 高于此值视为剧烈变化，逐帧推理
+MAX_FRAME_SKIP = 6                    # 轻微变化时的最大推理间隔（帧），按变化量在 [1, 6] 之间线性插值
+MOTION_FORCE_INTERVAL = 2.0           # 静止画面最长跳过时间（秒），到时强制推理一次，防止缓慢进入漏检
+
+
+def cpu_supports_int8_dot() -> bool:
+    """检查CPU是否支持 SDOT/UDOT 整数点积指令（ARMv8.2 asimddp）"""
+    try:
+        with open("/proc/cpuinfo") as f:
+            return "asimddp" in f.read()
+    except OSError:
+        return False
+
+
+@dataclass
+class TextSprite:
+    """
+    预渲染的文字图块
+
+    cv2.putText 每帧都要重新光栅化字形，开销较大。
+    固定文字只渲染一次，之后每帧按ROI切片拷贝即可。
+    """
+    image: np.ndarray        # BGR图块
+    mask: np.ndarray         # 文字像素掩码 (H, W, 1)
+    origin: Tuple[int, int]  # putText基线起点在图块内的坐标
+
+    @classmethod
+    def render(cls, text: str, font_scale: float, color: Tuple[int, int, int],
+               thickness: int = 1) -> "TextSprite":
+        """用 cv2.putText 渲染一次文字"""
+        (tw, th), baseline = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, font_scale, thickness)
+        pad = thickness
+        image = np.zeros((th + baseline + 2 * pad, tw + 2 * pad, 3), dtype=np.uint8)
+        origin = (pad, th + pad)
+        cv2.putText(image, text, origin, cv2.FONT_HERSHEY_SIMPLEX, font_scale, color, thickness)
+        mask = image.any(axis=2, keepdims=True)
+        return cls(image=image, mask=mask, origin=origin)
+
+    def blit(self, frame: np.ndarray, org: Tuple[int, int]):
+        """将图块拷贝到帧上，org 与 cv2.putText 的 org 含义一致"""
+        sh, sw = self.image.shape[:2]
+        fh, fw = frame.shape[:2]
+        x0 = org[0] - self.origin[0]
+        y0 = org[1] - self.origin[1]
+
+        # 裁剪到帧范围内
+        sx0, sy0 = max(0, -x0), max(0, -y0)
+        sx1, sy1 = min(sw, fw - x0), min(sh, fh - y0)
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+
+        np.copyto(frame[y0 + sy0:y0 + sy1, x0 + sx0:x0 + sx1],
+                  self.image[sy0:sy1, sx0:sx1],
+                  where=self.mask[sy0:sy1, sx0:sx1])
+
+
+@dataclass
+class ZoneLayers:
+    """
+    预渲染的区域静态图层
+    
+    区域填充（半透明混合）和线条/文字（不透明）都不随帧变化，
+    只需在区域或分辨率变化时重建，每帧一次混合即可完成绘制。
+    """
+    fill: Optional[np.ndarray]          # 区域包围盒内的填充色，无区域时为 None
+    covered: Optional[np.ndarray]       # 包围盒内被区域覆盖的像素掩码 (h, w, 1)，包围盒全覆盖时为 None
+    roi: Tuple[slice, slice]            # 所有区域的包围盒，只混合这部分像素
+    line_index: np.ndarray              # 线条/文字像素的扁平索引
+    line_pixels: np.ndarray             # 线条/文字像素颜色
+    
+    def draw(self, frame: np.ndarray):
+        """在 frame 上原地混合区域填充，再写入线条和文字像素"""
+        if self.fill is not None:
+            region = frame[self.roi]
+            if self.covered is None:
+                cv2.addWeighted(self.fill, 0.3, region, 0.7, 0, dst=region)
+            else:
+                # 包围盒未被完全覆盖时只写回被覆盖的像素，其余保持原图
+                blended = cv2.addWeighted(self.fill, 0.3, region, 0.7, 0)
+                np.copyto(region, blended, where=self.covered)
+        frame.reshape(-1, 3)[self.line_index] = self.line_pixels
+
 
 @dataclass
 class AlertInfo:
@@ -56,23 +188,30 @@ class ServerClient:
     def __init__(self, server_url: str, device_id: str):
         self.server_url = server_url.rstrip('/')
         self.device_id = device_id
-        self._session = None
-        self._ws = None
-        self._ws_connected = False
-        self._loop = None
-    
-    def _get_loop(self):
-        """获取或创建事件循环"""
-        try:
-            return asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            return loop
+        self._detection_url = f"{self.server_url}/api/detection"
+        self._frame_url = f"{self.server_url}/api/video/frame/upload"
+        
+        # 首次创建客户端时才导入 requests，禁用服务器上报时不占用内存
+        import requests
+        from requests.adapters import HTTPAdapter
+        
+        # 复用同一个HTTP会话（keep-alive），避免每次请求重新建立TCP连接
+        self._session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=8, max_retries=0)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        
+        # JPEG编码器：优先使用 TurboJPEG，加载失败（缺少 libturbojpeg）时回退到 OpenCV
+        self._tj = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._tj = TurboJPEG()
+                print("✓ 视频帧使用 TurboJPEG 编码")
+            except Exception as e:
+                print(f"⚠️ TurboJPEG 初始化失败，使用 OpenCV 编码: {e}")
     
     def report_detection_sync(self, person_count: int, in_danger_zone: bool, alert_triggered: bool):
         """同步方式上报检测结果（在单独线程中调用）"""
-        import requests
         try:
             data = {
                 "device_id": self.device_id,
@@ -80,8 +219,8 @@ class ServerClient:
                 "in_danger_zone": in_danger_zone,
                 "alert_triggered": alert_triggered
             }
-            response = requests.post(
-                f"{self.server_url}/api/detection",
+            response = self._session.post(
+                self._detection_url,
                 json=data,
                 timeout=2
             )
@@ -89,25 +228,30 @@ class ServerClient:
         except Exception as e:
             return False
     
-    def send_video_frame_sync(self, frame: np.ndarray, detection_info: dict = None):
-        """同步方式发送视频帧（通过HTTP）"""
-        import requests
+    def encode_frame(self, frame: np.ndarray) -> bytes:
+        """压缩图像为JPEG（4:2:0 色度抽样）"""
+        if self._tj is not None:
+            return self._tj.encode(frame, quality=VIDEO_QUALITY,
+                                   pixel_format=TJPF_BGR, jpeg_subsample=TJSAMP_420)
+        encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), VIDEO_QUALITY,
+                        int(cv2.IMWRITE_JPEG_SAMPLING_FACTOR), cv2.IMWRITE_JPEG_SAMPLING_FACTOR_420]
+        _, buffer = cv2.imencode('.jpg', frame, encode_param)
+        return buffer.tobytes()
+    
+    def send_video_frame_sync(self, jpeg: bytes, timestamp: str, detection_info: dict = None):
+        """同步方式发送已编码的视频帧（multipart 直接上传JPEG，不做base64编码）"""
         try:
-            # 压缩图像为JPEG
-            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), VIDEO_QUALITY]
-            _, buffer = cv2.imencode('.jpg', frame, encode_param)
-            frame_base64 = base64.b64encode(buffer).decode('utf-8')
-            
             data = {
                 "device_id": self.device_id,
-                "frame": frame_base64,
-                "timestamp": datetime.now().isoformat(),
-                "detection": detection_info
+                "timestamp": timestamp,
+                "detection": json.dumps(detection_info)
             }
+            files = {"frame": ("frame.jpg", jpeg, "image/jpeg")}
             
-            response = requests.post(
-                f"{self.server_url}/api/video/frame",
-                json=data,
+            response = self._session.post(
+                self._frame_url,
+                data=data,
+                files=files,
                 timeout=1
             )
             return response.status_code == 200
@@ -119,6 +263,62 @@ class ServerClient:
 server_client = None
 
 
+class CameraThread:
+    """
+    摄像头采集线程
+    
+    持续读取摄像头，只保留最新一帧：处理慢于采集时旧帧被覆盖，
+    不会在 V4L2 缓冲区中积压过时画面（部分后端不支持 CAP_PROP_BUFFERSIZE）。
+    每帧都是新分配的数组，发布后采集线程不再访问。
+    """
+    
+    def __init__(self, cap: cv2.VideoCapture):
+        self._cap = cap
+        self._cond = threading.Condition()
+        self._frame: Optional[np.ndarray] = None
+        self._frame_id = 0
+        self._failed = False
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        """启动采集线程"""
+        self._running = True
+        self._thread = threading.Thread(target=self._worker, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """停止采集线程"""
+        self._running = False
+        if self._thread and self._thread.is_alive():
+            self._thread.join(timeout=2.0)
+    
+    def _worker(self):
+        """采集循环"""
+        while self._running:
+            ret, frame = self._cap.read()
+            with self._cond:
+                if not ret:
+                    self._failed = True
+                    self._cond.notify_all()
+                    return
+                self._frame = frame
+                self._frame_id += 1
+                self._cond.notify_all()
+    
+    def read(self, last_id: int = 0, timeout: float = 2.0) -> Tuple[int, Optional[np.ndarray]]:
+        """
+        等待比 last_id 更新的一帧
+        Returns:
+            (帧序号, 帧) - 采集失败或超时时帧为 None
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._frame_id != last_id or self._failed, timeout)
+            if self._failed or self._frame_id == last_id:
+                return last_id, None
+            return self._frame_id, self._frame
+
+
 class ZoneDetector:
     """区域检测器 - 树莓派优化版"""
     
@@ -128,21 +328,74 @@ class ZoneDetector:
                  input_size: Tuple[int, int] = (416, 416),
                  alert_cooldown: float = 2.0):
         print("正在加载模型...")
-        self.model = YOLO(model_path)
-        self.model.fuse()
+        self.model = None
+        self.net = None
+        self.session = None
+        # 输入尺寸为32的倍数时可以直接拉伸到输入尺寸送入网络，不需要 letterbox
+        input_fits = bool(input_size) and all(v % 32 == 0 for v in input_size)
+        
+        if NCNN_AVAILABLE and os.path.isdir(model_path) and input_fits:
+            # 直接加载NCNN模型
+            self.net = ncnn.Net()
+            self.net.opt.use_vulkan_compute = False
+            self.net.opt.use_fp16_arithmetic = True
+            self.net.opt.num_threads = INFERENCE_THREADS
+            self.net.load_param(os.path.join(model_path, "model.ncnn.param"))
+            self.net.load_model(os.path.join(model_path, "model.ncnn.bin"))
+        elif ONNXRUNTIME_AVAILABLE and model_path.endswith(".onnx") and input_fits:
+            # 直接创建ONNX Runtime会话（算子融合等全部图优化）
+            options = ort.SessionOptions()
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.intra_op_num_threads = INFERENCE_THREADS
+            options.inter_op_num_threads = 1
+            self.session = ort.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+            model_input = self.session.get_inputs()[0]
+            self._onnx_input = model_input.name
+            # 静态尺寸导出的模型只能接受导出时的输入尺寸
+            exported = model_input.shape[2:]
+            if all(isinstance(v, int) for v in exported) and tuple(exported) != (input_size[1], input_size[0]):
+                print(f"⚠️ ONNX 模型输入尺寸为 {exported[1]}x{exported[0]}，已替换 input_size")
+                input_size = (exported[1], exported[0])
+        else:
+            self.model = YOLO(model_path)
+            # NCNN 模型不需要 fuse()
+            if model_path.endswith(".pt"):
+                self.model.fuse()
+        self.nms_threshold = 0.7  # 与 Ultralytics 默认 iou 一致
+        
+        # OpenCV 未启用 NEON/AVX2 时缩放、颜色转换、混合都走标量代码
+        if not any(isa in cv2.getBuildInformation() for isa in ("NEON", "AVX2")):
+            print("⚠️ 当前 OpenCV 未启用 NEON/AVX2 优化，图像处理会明显变慢")
 
         self.danger_zones: List[np.ndarray] = []
         self.safe_zones: List[np.ndarray] = []
+        self._danger_edges: List[Tuple[np.ndarray, ...]] = []   # 各区域预先展开的边数组，每帧直接使用
+        self._safe_edges: List[Tuple[np.ndarray, ...]] = []
+        self._danger_bbox = np.empty((0, 4), dtype=np.int64)     # 各区域包围盒 (xmin, ymin, xmax, ymax)，先用它排除
+        self._safe_bbox = np.empty((0, 4), dtype=np.int64)
         self.alert_callback: Optional[Callable[[AlertInfo], None]] = None
+        self._static_layers: Optional[ZoneLayers] = None   # 区域/警戒线静态图层，区域或分辨率变化时重建
+        self._static_shape = None
+        self._sprites = {}                  # (文字, 字号, 颜色, 粗细) -> TextSprite
         self.person_class_id = 0
         
         self.frame_skip = frame_skip
         self.frame_count = 0
+        self._prev_gray = None              # 上次推理帧的 80x60 灰度缩略图
+        self._last_infer_frame = 0
+        self._last_infer_time = 0.0
+        self._danger_count = 0              # 最近一帧危险区人数，有人时静止画面也保持推理
         self.input_size = input_size
+        # Ultralytics 推理时直接送入预处理好的张量，跳过其 letterbox/转置/归一化
+        self._tensor_input = input_fits and self.model is not None
+        # 显式指定推理尺寸 (h, w)，否则 .pt 模型默认 imgsz=640，会把已缩放的输入再 letterbox 放大
+        self._imgsz = (input_size[1], input_size[0]) if input_size else 640
         self.alert_cooldown = alert_cooldown
         self.last_alert_time = {}
+        self._ts_cache = (0, "")            # (整秒, 格式化时间)，同一秒内复用
         
         self.last_detections = []
+        self._latest_detections = []        # 推理线程发布的最新结果（整体替换，无需加锁）
         self.scale_x = 1.0
         self.scale_y = 1.0
         
@@ -150,25 +403,137 @@ class ZoneDetector:
         self.last_stream_time = 0
         self.stream_interval = 1.0 / VIDEO_STREAM_FPS
         
+        # 上报和推流各用一个常驻线程，不再每帧新建线程；推流队列只保留最新一帧
+        self._report_queue = queue.Queue(maxsize=8)
+        self._stream_queue = queue.Queue(maxsize=1)
+        threading.Thread(target=self._report_worker, daemon=True).start()
+        threading.Thread(target=self._stream_worker, daemon=True).start()
+        
         print(f"模型加载完成 | 跳帧: {frame_skip} | 输入尺寸: {input_size}")
         
     def add_danger_zone(self, points: List[Tuple[int, int]]):
         self.danger_zones.append(np.array(points, dtype=np.int32))
+        self._danger_edges.append(self._zone_edges(self.danger_zones[-1]))
+        self._danger_bbox = np.vstack([self._danger_bbox, self._zone_bbox(self.danger_zones[-1])])
+        self._static_shape = None
         print(f"✓ 危险区域已添加: {points}")
         
     def add_safe_zone(self, points: List[Tuple[int, int]]):
         self.safe_zones.append(np.array(points, dtype=np.int32))
+        self._safe_edges.append(self._zone_edges(self.safe_zones[-1]))
+        self._safe_bbox = np.vstack([self._safe_bbox, self._zone_bbox(self.safe_zones[-1])])
+        self._static_shape = None
         print(f"✓ 安全区域已添加: {points}")
         
     def clear_zones(self):
         self.danger_zones.clear()
         self.safe_zones.clear()
+        self._danger_edges.clear()
+        self._safe_edges.clear()
+        self._danger_bbox = np.empty((0, 4), dtype=np.int64)
+        self._safe_bbox = np.empty((0, 4), dtype=np.int64)
+        self._static_shape = None
         
     def set_alert_callback(self, callback: Callable[[AlertInfo], None]):
         self.alert_callback = callback
         
-    def _point_in_zone(self, point: Tuple[int, int], zone: np.ndarray) -> bool:
-        return cv2.pointPolygonTest(zone, point, False) >= 0
+    def text_sprite(self, text: str, font_scale: float, color: Tuple[int, int, int],
+                    thickness: int = 1) -> TextSprite:
+        """获取缓存的文字图块（人数、FPS 等变化的文字按内容分别缓存）"""
+        key = (text, font_scale, color, thickness)
+        sprite = self._sprites.get(key)
+        if sprite is None:
+            if len(self._sprites) >= 256:
+                self._sprites.clear()
+            sprite = self._sprites[key] = TextSprite.render(text, font_scale, color, thickness)
+        return sprite
+    
+    def _build_static_layers(self, h: int, w: int) -> ZoneLayers:
+        """预渲染区域填充色、区域边框、中线警戒线和文字"""
+        # 填充逐个绘制（fillPoly 一次画多个多边形时重叠部分会被挖空）
+        fill = np.zeros((h, w, 3), dtype=np.uint8)
+        for zone in self.danger_zones:
+            cv2.fillPoly(fill, [zone], (0, 0, 200))
+        for zone in self.safe_zones:
+            cv2.fillPoly(fill, [zone], (0, 200, 0))
+        covered = fill.any(axis=2)
+        
+        # 边框按颜色一次性绘制
+        lines = np.zeros((h, w, 3), dtype=np.uint8)
+        if self.danger_zones:
+            cv2.polylines(lines, self.danger_zones, True, (0, 0, 255), 2)
+        if self.safe_zones:
+            cv2.polylines(lines, self.safe_zones, True, (0, 255, 0), 2)
+        
+        mid_x = w // 2
+        cv2.line(lines, (mid_x, 0), (mid_x, h), (0, 255, 255), 2)
+        cv2.putText(lines, "WARNING LINE", (mid_x + 10, 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        
+        # 区域填充只保留所有区域的包围盒部分，每帧混合的像素数随区域面积缩小
+        roi = (slice(0, 0), slice(0, 0))
+        if covered.any():
+            ys, xs = np.flatnonzero(covered.any(axis=1)), np.flatnonzero(covered.any(axis=0))
+            roi = (slice(int(ys[0]), int(ys[-1]) + 1), slice(int(xs[0]), int(xs[-1]) + 1))
+            fill, covered = fill[roi], covered[roi]
+        
+        line_index = np.flatnonzero(lines.any(axis=2))
+        return ZoneLayers(
+            fill=fill if covered.any() else None,
+            covered=None if covered.all() else covered[..., None],
+            roi=roi,
+            line_index=line_index,
+            line_pixels=lines.reshape(-1, 3)[line_index]
+        )
+    
+    @staticmethod
+    def _zone_edges(zone: np.ndarray) -> Tuple[np.ndarray, ...]:
+        """
+        添加区域时展开边数组（起点、方向、包围范围），区域不变则每帧无需重新计算
+        Returns:
+            (x1, y1, dx, dy, xmin, xmax, ymin, ymax)，均为 (M,) 的 int64 数组
+        """
+        start = zone.astype(np.int64)
+        end = np.roll(start, -1, axis=0)
+        x1, y1, x2, y2 = start[:, 0], start[:, 1], end[:, 0], end[:, 1]
+        return (x1, y1, x2 - x1, y2 - y1,
+                np.minimum(x1, x2), np.maximum(x1, x2), np.minimum(y1, y2), np.maximum(y1, y2))
+    
+    @staticmethod
+    def _zone_bbox(zone: np.ndarray) -> np.ndarray:
+        """区域包围盒 (xmin, ymin, xmax, ymax)"""
+        return np.concatenate([zone.min(axis=0), zone.max(axis=0)]).astype(np.int64)
+    
+    @staticmethod
+    def _points_in_zone(points: np.ndarray, edges: Tuple[np.ndarray, ...]) -> np.ndarray:
+        """
+        批量判断点是否在区域内（含边界，与 pointPolygonTest >= 0 一致）
+        射线法统计穿越边数（奇数在内部），另判断是否落在边上，全部为整数numpy运算
+        Returns:
+            布尔数组 (N,)
+        """
+        x1, y1, dx, dy, xmin, xmax, ymin, ymax = edges
+        px, py = points[:, 0, None], points[:, 1, None]                 # (N, 1)
+        cross = dx * (py - y1) - dy * (px - x1)                         # (N, M)
+        on_edge = ((cross == 0)
+                   & (px >= xmin) & (px <= xmax) & (py >= ymin) & (py <= ymax))
+        # 向右的水平射线穿过该边：边跨过 py，且交点在点的右侧（无除法）
+        hits = ((y1 > py) != (y1 + dy > py)) & (cross * dy > 0)
+        return (hits.sum(axis=1) % 2 == 1) | on_edge.any(axis=1)
+    
+    def _zone_matrix(self, points: np.ndarray, zone_edges: List[Tuple[np.ndarray, ...]],
+                     zone_bbox: np.ndarray) -> np.ndarray:
+        """
+        每个点对每个区域的判断结果 (N, 区域数)
+        先用包围盒一次性排除，只对落在包围盒内的点做射线法判断
+        """
+        px, py = points[:, 0, None], points[:, 1, None]                 # (N, 1)
+        matrix = ((px >= zone_bbox[:, 0]) & (py >= zone_bbox[:, 1])
+                  & (px <= zone_bbox[:, 2]) & (py <= zone_bbox[:, 3]))  # (N, 区域数)
+        for i in np.flatnonzero(matrix.any(axis=0)):
+            candidates = matrix[:, i]
+            matrix[candidates, i] = self._points_in_zone(points[candidates], zone_edges[i])
+        return matrix
     
     def _get_person_center(self, bbox: Tuple[int, int, int, int]) -> Tuple[int, int]:
         x1, y1, x2, y2 = bbox
@@ -185,114 +550,214 @@ class ZoneDetector:
             return True
         return False
     
-    def _check_zones(self, center: Tuple[int, int], bbox: Tuple[int, int, int, int]) -> List[AlertInfo]:
+    def _timestamp(self) -> str:
+        """当前时间字符串（精确到秒，同一秒内只格式化一次）"""
+        t = int(time.time())
+        if t != self._ts_cache[0]:
+            self._ts_cache = (t, time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t)))
+        return self._ts_cache[1]
+    
+    def _check_zones(self, bbox: Tuple[int, int, int, int],
+                     in_danger: np.ndarray, in_safe: np.ndarray) -> List[AlertInfo]:
+        """根据预先算好的区域判断结果（每个区域一个布尔值）生成警报"""
         alerts = []
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        for i, zone in enumerate(self.danger_zones):
-            if self._point_in_zone(center, zone):
-                zone_id = f"danger_{i}"
-                if self._should_send_alert(zone_id):
-                    alert = AlertInfo(
-                        timestamp=timestamp,
-                        zone_type="danger",
-                        person_count=1,
-                        message=f"⚠️ 警告：检测到人员进入危险区域 {i+1}！",
-                        bbox=bbox
-                    )
-                    alerts.append(alert)
-                
-        for i, zone in enumerate(self.safe_zones):
-            if self._point_in_zone(center, zone):
+        if not (in_danger.any() or in_safe.any()):
+            return alerts
+        timestamp = self._timestamp()
+        
+        for i in np.flatnonzero(in_danger):
+            zone_id = f"danger_{i}"
+            if self._should_send_alert(zone_id):
                 alert = AlertInfo(
                     timestamp=timestamp,
-                    zone_type="safe",
+                    zone_type="danger",
                     person_count=1,
-                    message=f"✓ 人员在安全区域 {i+1}",
+                    message=f"⚠️ 警告：检测到人员进入危险区域 {i+1}！",
                     bbox=bbox
                 )
                 alerts.append(alert)
                 
+        for i in np.flatnonzero(in_safe):
+            alert = AlertInfo(
+                timestamp=timestamp,
+                zone_type="safe",
+                person_count=1,
+                message=f"✓ 人员在安全区域 {i+1}",
+                bbox=bbox
+            )
+            alerts.append(alert)
+                
         return alerts
 
 
-    def detect_frame(self, frame: np.ndarray, conf_threshold: float = 0.5) -> Tuple[np.ndarray, List[AlertInfo], dict]:
+    def _should_infer(self, frame: np.ndarray) -> bool:
+        """
+        决定当前帧是否推理（自适应跳帧）
+        与上次推理帧的灰度差越大推理越频繁：静止画面不推理（危险区有人时按最大间隔推理），
+        剧烈变化时逐帧推理，两者之间线性插值推理间隔
+        """
+        self.frame_count += 1
+        if not ADAPTIVE_SKIP_ENABLED:
+            return self.frame_count % self.frame_skip == 0
+        
+        gray = cv2.cvtColor(cv2.resize(frame, (80, 60), interpolation=cv2.INTER_AREA),
+                            cv2.COLOR_BGR2GRAY)
+        now = time.time()
+        if self._prev_gray is None or now - self._last_infer_time >= MOTION_FORCE_INTERVAL:
+            run = True
+        else:
+            diff = cv2.norm(gray, self._prev_gray, cv2.NORM_L1) / gray.size
+            if diff >= MOTION_BUSY_THRESHOLD:
+                skip = 1
+            elif diff >= MOTION_STATIC_THRESHOLD:
+                ratio = (diff - MOTION_STATIC_THRESHOLD) / (MOTION_BUSY_THRESHOLD - MOTION_STATIC_THRESHOLD)
+                skip = round(MAX_FRAME_SKIP - ratio * (MAX_FRAME_SKIP - 1))
+            elif self._danger_count > 0:
+                skip = MAX_FRAME_SKIP
+            else:
+                return False
+            run = self.frame_count - self._last_infer_frame >= skip
+        
+        if run:
+            self._prev_gray = gray
+            self._last_infer_frame = self.frame_count
+            self._last_infer_time = now
+        return run
+    
+    def _preprocess(self, frame: np.ndarray):
+        """
+        生成网络输入（总是新分配的数组，不与原帧共享内存，可安全交给推理线程）
+        Returns:
+            (网络输入, x缩放比例, y缩放比例)
+        """
+        h_orig, w_orig = frame.shape[:2]
+        if self.net is not None:
+            # 缩放 + BGR→RGB 在NCNN内部一次完成，再归一化到 0~1
+            model_input = ncnn.Mat.from_pixels_resize(frame, ncnn.Mat.PixelType.PIXEL_BGR2RGB,
+                                                      w_orig, h_orig, *self.input_size)
+            model_input.substract_mean_normalize([], [1 / 255.0] * 3)
+        elif self._tensor_input or self.session is not None:
+            # 缩放、BGR→RGB、/255、HWC→CHW 由 blobFromImage 一次完成，输出 (1, 3, H, W) float32
+            model_input = cv2.dnn.blobFromImage(frame, 1 / 255.0, self.input_size, swapRB=True, crop=False)
+            if self._tensor_input:
+                model_input = torch.from_numpy(model_input)
+        elif self.input_size:
+            # 缩小超过2倍时 INTER_AREA 抗混叠更好，速度相近
+            interpolation = cv2.INTER_AREA if w_orig > 2 * self.input_size[0] else cv2.INTER_LINEAR
+            model_input = cv2.resize(frame, self.input_size, interpolation=interpolation)
+        else:
+            return frame.copy(), 1.0, 1.0
+        return model_input, w_orig / self.input_size[0], h_orig / self.input_size[1]
+    
+    def _infer_ncnn(self, mat_in, scale_x: float, scale_y: float,
+                    conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """直接调用NCNN推理并解码YOLOv8输出"""
+        ex = self.net.create_extractor()
+        ex.input("in0", mat_in)
+        _, mat_out = ex.extract("out0")
+        return self._decode(np.array(mat_out), scale_x, scale_y, conf_threshold)
+    
+    def _infer_onnx(self, blob: np.ndarray, scale_x: float, scale_y: float,
+                    conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """直接调用ONNX Runtime推理并解码YOLOv8输出"""
+        pred = self.session.run(None, {self._onnx_input: blob})[0]
+        return self._decode(pred[0], scale_x, scale_y, conf_threshold)
+    
+    def _decode(self, pred: np.ndarray, scale_x: float, scale_y: float,
+                conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """
+        解码YOLOv8原始输出（置信度过滤 + NMS），并缩放回原图坐标
+        Args:
+            pred: 形状 (4 + 类别数, 锚点数)：cx, cy, w, h, 各类别得分
+        """
+        scores = pred[4 + self.person_class_id]
+        keep = scores > conf_threshold
+        if not keep.any():
+            return []
+        
+        cx, cy, bw, bh = pred[:4, keep]
+        scores = scores[keep]
+        boxes = np.stack([cx - bw / 2, cy - bh / 2, bw, bh], axis=1)
+        indices = cv2.dnn.NMSBoxes(boxes.tolist(), scores.tolist(), conf_threshold, self.nms_threshold)
+        
+        indices = np.asarray(indices, dtype=np.int64).reshape(-1)
+        xyxy = boxes[indices]
+        xyxy[:, 2:] += xyxy[:, :2]
+        xyxy = (xyxy * np.array([scale_x, scale_y, scale_x, scale_y])).astype(np.int32)
+        return list(zip(*xyxy.T.tolist(), scores[indices].tolist()))
+    
+    def _infer(self, model_input, scale_x: float, scale_y: float,
+               conf_threshold: float) -> List[Tuple[int, int, int, int, float]]:
+        """推理并把边界框缩放回原图坐标"""
+        if self.net is not None:
+            return self._infer_ncnn(model_input, scale_x, scale_y, conf_threshold)
+        if self.session is not None:
+            return self._infer_onnx(model_input, scale_x, scale_y, conf_threshold)
+        
+        results = self.model(model_input, imgsz=self._imgsz, conf=conf_threshold,
+                             classes=[self.person_class_id], verbose=False, device='cpu')
+        
+        detections = []
+        scale = np.array([scale_x, scale_y, scale_x, scale_y])
+        for result in results:
+            if len(result.boxes) == 0:
+                continue
+            # 整个张量一次性转换并批量缩放，避免逐框 .cpu().numpy()
+            xyxy = (result.boxes.xyxy.cpu().numpy().astype(np.int32) * scale).astype(np.int32)
+            confs = result.boxes.conf.cpu().numpy()
+            detections.extend(zip(*xyxy.T.tolist(), confs.tolist()))
+        return detections
+
+    def detect_frame(self, frame: np.ndarray, conf_threshold: float = 0.5,
+                     detections: Optional[list] = None) -> Tuple[np.ndarray, List[AlertInfo], dict]:
         """
         检测单帧图像
         
+        Args:
+            detections: 推理线程给出的最新结果；为 None 时按跳帧设置在当前线程推理
         Returns:
             处理后的图像、警报列表、检测信息字典
         """
         all_alerts = []
         h_orig, w_orig = frame.shape[:2]
         
-        self.frame_count += 1
-        should_detect = (self.frame_count % self.frame_skip == 0)
-        
-        if should_detect:
-            if self.input_size:
-                resized = cv2.resize(frame, self.input_size)
-                self.scale_x = w_orig / self.input_size[0]
-                self.scale_y = h_orig / self.input_size[1]
-            else:
-                resized = frame
-                self.scale_x = 1.0
-                self.scale_y = 1.0
+        if detections is None:
+            should_detect = self._should_infer(frame)
             
-            results = self.model(resized, conf=conf_threshold, classes=[self.person_class_id], 
-                               verbose=False, device='cpu')
-            
-            self.last_detections = []
-            for result in results:
-                boxes = result.boxes
-                for box in boxes:
-                    x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-                    conf = float(box.conf[0])
-                    
-                    x1 = int(x1 * self.scale_x)
-                    y1 = int(y1 * self.scale_y)
-                    x2 = int(x2 * self.scale_x)
-                    y2 = int(y2 * self.scale_y)
-                    
-                    self.last_detections.append((x1, y1, x2, y2, conf))
+            if should_detect:
+                model_input, self.scale_x, self.scale_y = self._preprocess(frame)
+                self.last_detections = self._infer(model_input, self.scale_x, self.scale_y, conf_threshold)
+        else:
+            # 推理线程每次产生新的列表对象，对象变化即表示有新的检测结果（警报只在新结果上判断）
+            should_detect = detections is not self.last_detections
+            self.last_detections = detections
         
         danger_count = 0
         person_count = len(self.last_detections)
         in_danger_zone = False
         
-        # 绘制区域
-        if len(self.danger_zones) > 0 or len(self.safe_zones) > 0:
-            overlay = frame.copy()
-            
-            for zone in self.danger_zones:
-                cv2.fillPoly(overlay, [zone], (0, 0, 200))
-                cv2.polylines(frame, [zone], True, (0, 0, 255), 2)
-                
-            for zone in self.safe_zones:
-                cv2.fillPoly(overlay, [zone], (0, 200, 0))
-                cv2.polylines(frame, [zone], True, (0, 255, 0), 2)
-                
-            cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+        # 绘制区域和中线警戒线（静态图层，只在区域或分辨率变化时重建）
+        if self._static_shape != (h_orig, w_orig):
+            self._static_shape = (h_orig, w_orig)
+            self._static_layers = self._build_static_layers(h_orig, w_orig)
+        self._static_layers.draw(frame)
         
-        # 绘制中线警戒线
-        mid_x = w_orig // 2
-        cv2.line(frame, (mid_x, 0), (mid_x, h_orig), (0, 255, 255), 2)
-        cv2.putText(frame, "WARNING LINE", (mid_x + 10, 30), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
+        # 处理检测结果：所有中心点对所有区域只判断一次，警报和绘制共用
+        centers = [self._get_person_center(d[:4]) for d in self.last_detections]
+        points = np.array(centers, dtype=np.int64).reshape(-1, 2)
+        danger_matrix = self._zone_matrix(points, self._danger_edges, self._danger_bbox)
+        safe_matrix = self._zone_matrix(points, self._safe_edges, self._safe_bbox) if should_detect else None
         
-        # 处理检测结果
-        for detection in self.last_detections:
+        for idx, detection in enumerate(self.last_detections):
             x1, y1, x2, y2, conf = detection
             bbox = (x1, y1, x2, y2)
-            center = self._get_person_center(bbox)
+            center = centers[idx]
             
             if should_detect:
-                alerts = self._check_zones(center, bbox)
+                alerts = self._check_zones(bbox, danger_matrix[idx], safe_matrix[idx])
                 all_alerts.extend(alerts)
             
-            in_danger = any(self._point_in_zone(center, zone) for zone in self.danger_zones)
-            
-            if in_danger:
+            if danger_matrix[idx].any():
                 danger_count += 1
                 in_danger_zone = True
                 color = (0, 0, 255)
@@ -302,19 +767,16 @@ class ZoneDetector:
                 label = "Person"
             
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
-            cv2.putText(frame, label, (x1, y1 - 10), 
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+            self.text_sprite(label, 0.5, color, 2).blit(frame, (x1, y1 - 10))
             cv2.circle(frame, center, 4, color, -1)
         
         # 显示警告信息
         if danger_count > 0:
             warning_text = f"WARNING: {danger_count} in DANGER ZONE!"
-            cv2.putText(frame, warning_text, (10, 30),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 255), 2)
+            self.text_sprite(warning_text, 0.8, (0, 0, 255), 2).blit(frame, (10, 30))
         
         # 显示人数统计
-        cv2.putText(frame, f"Persons: {person_count}", (10, 60),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+        self.text_sprite(f"Persons: {person_count}", 0.6, (255, 255, 255), 2).blit(frame, (10, 60))
             
         # 触发回调
         if should_detect:
@@ -322,6 +784,8 @@ class ZoneDetector:
                 if alert.zone_type == "danger" and self.alert_callback:
                     self.alert_callback(alert)
         
+        self._danger_count = danger_count
+        
         # 检测信息
         detection_info = {
             "person_count": person_count,
@@ -338,12 +802,23 @@ class ZoneDetector:
                    display_fps: bool = True,
                    camera_width: int = 640,
                    camera_height: int = 480,
-                   headless: bool = False):
-        """运行摄像头检测"""
-        global server_client
+                   headless: bool = False,
+                   async_inference: bool = True,
+                   conf_threshold: float = 0.5):
+        """
+        运行摄像头检测
+        
+        Args:
+            async_inference: 推理放到独立线程，主循环只负责读帧、绘制和显示，
+                             始终使用最近一次完成的检测结果（跳帧由推理耗时自然决定）
+        """
         
-        cap = cv2.VideoCapture(camera_id)
+        # Linux 上显式使用 V4L2 后端（MMAP 缓冲区），避免 GStreamer 等后端额外的整帧拷贝
+        cap = cv2.VideoCapture(camera_id, cv2.CAP_V4L2) if IS_LINUX else cv2.VideoCapture(camera_id)
         
+        # USB摄像头优先输出MJPEG：YUYV 在 USB2 带宽下常被限制在低帧率，MJPEG 可稳定 30 FPS
+        # 必须在设置分辨率之前设置，驱动按格式协商可用分辨率
+        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
         cap.set(cv2.CAP_PROP_FRAME_WIDTH, camera_width)
         cap.set(cv2.CAP_PROP_FRAME_HEIGHT, camera_height)
         cap.set(cv2.CAP_PROP_FPS, 30)
@@ -352,6 +827,10 @@ class ZoneDetector:
         if not cap.isOpened():
             print("错误：无法打开摄像头")
             return
+        
+        fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+        if fourcc and fourcc != cv2.VideoWriter_fourcc(*'MJPG'):
+            print(f"⚠️ 摄像头不支持MJPEG输出，当前格式: {fourcc.to_bytes(4, 'little').decode('ascii', 'replace')}")
             
         print("="*60)
         print("🚀 区域检测系统已启动")
@@ -372,15 +851,47 @@ class ZoneDetector:
         if not headless:
             cv2.namedWindow(window_name)
         
+        infer_queue = None
+        if async_inference:
+            # 单槽队列：只保留最新一帧的网络输入，推理线程空闲时总是处理最新画面
+            infer_queue = queue.Queue(maxsize=1)
+            self._latest_detections = self.last_detections
+            infer_thread = threading.Thread(target=self._inference_worker,
+                                            args=(infer_queue, conf_threshold), daemon=True)
+            infer_thread.start()
+        
+        # 采集线程持续取帧，主循环总是拿到最新一帧
+        camera = CameraThread(cap)
+        camera.start()
+        frame_id = 0
+        
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                frame_id, frame = camera.read(frame_id)
+                if frame is None:
                     print("错误：无法读取帧")
                     break
                 
                 # 检测
-                processed_frame, alerts, detection_info = self.detect_frame(frame)
+                if infer_queue is not None:
+                    if self._should_infer(frame):
+                        item = self._preprocess(frame)
+                        try:
+                            infer_queue.put_nowait(item)
+                        except queue.Full:
+                            # 替换尚未开始推理的旧帧
+                            try:
+                                infer_queue.get_nowait()
+                            except queue.Empty:
+                                pass
+                            try:
+                                infer_queue.put_nowait(item)
+                            except queue.Full:
+                                pass
+                    processed_frame, alerts, detection_info = self.detect_frame(
+                        frame, conf_threshold, detections=self._latest_detections)
+                else:
+                    processed_frame, alerts, detection_info = self.detect_frame(frame, conf_threshold)
                 
                 # 上报检测结果到服务器
                 if ENABLE_SERVER_REPORT and detection_info["alert_triggered"]:
@@ -398,8 +909,8 @@ class ZoneDetector:
                         fps_start_time = time.time()
                         fps_frame_count = 0
                     
-                    cv2.putText(processed_frame, f"FPS: {fps:.1f}", (10, frame.shape[0] - 10),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+                    self.text_sprite(f"FPS: {fps:.1f}", 0.6, (255, 255, 255), 2).blit(
+                        processed_frame, (10, frame.shape[0] - 10))
                 
                 if not headless:
                     cv2.imshow(window_name, processed_frame)
@@ -407,45 +918,87 @@ class ZoneDetector:
                     if key == ord('q'):
                         print("\n正在退出...")
                         break
-                else:
-                    time.sleep(0.01)
+                # 无界面模式不再休眠：camera.read() 会阻塞到下一帧到达
                     
         except KeyboardInterrupt:
             print("\n\n收到中断信号，正在退出...")
         finally:
+            if infer_queue is not None:
+                # 通知推理线程退出（清空队列确保结束标记能放入）
+                try:
+                    infer_queue.get_nowait()
+                except queue.Empty:
+                    pass
+                infer_queue.put(None)
+                infer_thread.join(timeout=2.0)
+            camera.stop()
             cap.release()
             if not headless:
                 cv2.destroyAllWindows()
             print("✓ 程序已安全退出")
     
+    def _inference_worker(self, infer_queue: queue.Queue, conf_threshold: float):
+        """推理线程：处理最新一帧，结果以整体替换的方式发布给主循环"""
+        while True:
+            item = infer_queue.get()
+            if item is None:
+                break
+            model_input, scale_x, scale_y = item
+            try:
+                self._latest_detections = self._infer(model_input, scale_x, scale_y, conf_threshold)
+            except Exception as e:
+                print(f"推理错误: {e}")
+    
     def _report_to_server(self, detection_info: dict):
-        """上报检测结果到服务器（异步）"""
-        global server_client
+        """上报检测结果到服务器（非阻塞，队列满时丢弃）"""
         if server_client:
-            def _report():
-                server_client.report_detection_sync(
-                    person_count=detection_info["person_count"],
-                    in_danger_zone=detection_info["in_danger_zone"],
-                    alert_triggered=detection_info["alert_triggered"]
-                )
-            thread = threading.Thread(target=_report)
-            thread.daemon = True
-            thread.start()
+            try:
+                self._report_queue.put_nowait(detection_info)
+            except queue.Full:
+                pass
     
     def _stream_video_frame(self, frame: np.ndarray, detection_info: dict):
         """推送视频帧（限制帧率）"""
-        global server_client
         current_time = time.time()
         
         if current_time - self.last_stream_time >= self.stream_interval:
             self.last_stream_time = current_time
             
             if server_client:
-                def _stream():
-                    server_client.send_video_frame_sync(frame, detection_info)
-                thread = threading.Thread(target=_stream)
-                thread.daemon = True
-                thread.start()
+                item = (frame, datetime.now().isoformat(), detection_info)
+                try:
+                    self._stream_queue.put_nowait(item)
+                except queue.Full:
+                    # 丢弃尚未发送的旧帧，保证推送的总是最新画面
+                    try:
+                        self._stream_queue.get_nowait()
+                    except queue.Empty:
+                        pass
+                    try:
+                        self._stream_queue.put_nowait(item)
+                    except queue.Full:
+                        pass
+    
+    def _report_worker(self):
+        """检测结果上报线程"""
+        while True:
+            detection_info = self._report_queue.get()
+            server_client.report_detection_sync(
+                person_count=detection_info["person_count"],
+                in_danger_zone=detection_info["in_danger_zone"],
+                alert_triggered=detection_info["alert_triggered"]
+            )
+    
+    def _stream_worker(self):
+        """视频帧推送线程"""
+        while True:
+            frame, timestamp, detection_info = self._stream_queue.get()
+            # 只编码真正出队发送的帧，被限流或被新帧替换的帧不做JPEG编码
+            try:
+                jpeg = server_client.encode_frame(frame)
+            except Exception:
+                continue
+            server_client.send_video_frame_sync(jpeg, timestamp, detection_info)
 
 
 
@@ -458,6 +1011,8 @@ class GPIOController:
         self.buzzer_pin = buzzer_pin
         self.gpio_initialized = False
         self.led_state = False
+        self._led_off_timer: Optional[threading.Timer] = None     # 自动熄灭定时器，重复报警时重新计时
+        self._buzzer_off_timer: Optional[threading.Timer] = None
         
         if IS_LINUX:
             try:
@@ -498,16 +1053,39 @@ class GPIOController:
             except Exception as e:
                 print(f"LED熄灭失败: {e}")
     
+    def flash_led(self, duration: float = 3.0):
+        """点亮LED，duration 秒后自动熄灭（期间再次调用会重新计时）"""
+        if self._led_off_timer:
+            self._led_off_timer.cancel()
+        self.turn_on_led()
+        self._led_off_timer = threading.Timer(duration, self.turn_off_led)
+        self._led_off_timer.daemon = True
+        self._led_off_timer.start()
+    
+    def _buzzer_off(self):
+        try:
+            self.GPIO.output(self.buzzer_pin, self.GPIO.LOW)
+        except Exception as e:
+            print(f"蜂鸣器关闭失败: {e}")
+    
     def buzzer_beep(self, duration: float = 0.5):
+        """蜂鸣器响 duration 秒（非阻塞，由定时器关闭）"""
         if self.gpio_initialized:
+            if self._buzzer_off_timer:
+                self._buzzer_off_timer.cancel()
             try:
                 self.GPIO.output(self.buzzer_pin, self.GPIO.HIGH)
-                time.sleep(duration)
-                self.GPIO.output(self.buzzer_pin, self.GPIO.LOW)
             except Exception as e:
                 print(f"蜂鸣器响声失败: {e}")
+                return
+            self._buzzer_off_timer = threading.Timer(duration, self._buzzer_off)
+            self._buzzer_off_timer.daemon = True
+            self._buzzer_off_timer.start()
     
     def cleanup(self):
+        for timer in (self._led_off_timer, self._buzzer_off_timer):
+            if timer:
+                timer.cancel()
         if self.gpio_initialized:
             try:
                 self.GPIO.cleanup()
@@ -519,20 +1097,62 @@ class GPIOController:
 # 全局GPIO控制器实例
 gpio_controller = None
 
+ALARM_WAV = '/usr/share/sounds/alsa/Front_Center.wav'
+
+
+class AlarmPlayer:
+    """报警音播放器：WAV 只解码一次，复用同一个 ALSA 播放句柄"""
+    
+    def __init__(self, wav_path: str = ALARM_WAV):
+        self._lock = threading.Lock()
+        self._pcm = None
+        self._chunks: List[bytes] = []
+        try:
+            with wave.open(wav_path, 'rb') as wf:
+                channels, width, rate = wf.getnchannels(), wf.getsampwidth(), wf.getframerate()
+                data = wf.readframes(wf.getnframes())
+            if width != 2:
+                raise ValueError(f"仅支持16位WAV，当前 {width * 8} 位")
+            
+            period = 1024
+            self._pcm = alsaaudio.PCM(alsaaudio.PCM_PLAYBACK, device='default', channels=channels,
+                                      rate=rate, format=alsaaudio.PCM_FORMAT_S16_LE, periodsize=period)
+            # 按周期切分，最后一块补静音到整周期
+            period_bytes = period * channels * width
+            data += b'\x00' * (-len(data) % period_bytes)
+            self._chunks = [data[i:i + period_bytes] for i in range(0, len(data), period_bytes)]
+        except Exception as e:
+            self._pcm = None
+            print(f"⚠️ ALSA报警音初始化失败，使用 aplay 播放: {e}")
+    
+    def play(self) -> bool:
+        """播放报警音（阻塞到播放结束），不可用时返回 False"""
+        if self._pcm is None:
+            return False
+        with self._lock:
+            for chunk in self._chunks:
+                self._pcm.write(chunk)
+        return True
+
+
+alarm_player: Optional[AlarmPlayer] = None
+
 
 def play_alarm_sound():
     """播放报警声音（跨平台支持）"""
-    global gpio_controller
+    global gpio_controller, alarm_player
     
     try:
         if IS_WINDOWS:
             winsound.Beep(1000, 500)
         elif IS_LINUX:
-            try:
-                subprocess.run(['aplay', '-q', '/usr/share/sounds/alsa/Front_Center.wav'], 
-                             timeout=2, check=False)
-            except FileNotFoundError:
-                pass
+            if ALSAAUDIO_AVAILABLE and alarm_player is None:
+                alarm_player = AlarmPlayer()
+            if not (alarm_player and alarm_player.play()):
+                try:
+                    subprocess.run(['aplay', '-q', ALARM_WAV], timeout=2, check=False)
+                except FileNotFoundError:
+                    pass
             
             if gpio_controller:
                 gpio_controller.buzzer_beep(0.5)
@@ -542,19 +1162,36 @@ def play_alarm_sound():
         print(f"报警声音播放失败: {e}")
 
 
+# 报警音由一个常驻线程播放；队列只有一个位置，播放期间的重复报警合并为一次
+_alarm_queue: queue.Queue = queue.Queue(maxsize=1)
+_alarm_thread: Optional[threading.Thread] = None
+
+
+def _alarm_worker():
+    """报警音播放线程"""
+    while True:
+        _alarm_queue.get()
+        play_alarm_sound()
+
+
+def request_alarm_sound():
+    """请求播放报警音（非阻塞）"""
+    global _alarm_thread
+    if _alarm_thread is None:
+        _alarm_thread = threading.Thread(target=_alarm_worker, daemon=True)
+        _alarm_thread.start()
+    try:
+        _alarm_queue.put_nowait(None)
+    except queue.Full:
+        pass
+
+
 def control_led_alarm():
     """控制LED报警灯"""
     global gpio_controller
     
     if gpio_controller:
-        gpio_controller.turn_on_led()
-        
-        def auto_turn_off():
-            time.sleep(3.0)
-            gpio_controller.turn_off_led()
-        
-        led_thread = threading.Thread(target=auto_turn_off)
-        led_thread.start()
+        gpio_controller.flash_led(3.0)
 
 
 def alert_handler(alert: AlertInfo):
@@ -567,12 +1204,10 @@ def alert_handler(alert: AlertInfo):
         print(f"{'='*50}\n")
         
         # 播放报警声
-        alarm_thread = threading.Thread(target=play_alarm_sound)
-        alarm_thread.start()
+        request_alarm_sound()
         
-        # 控制LED
-        led_thread = threading.Thread(target=control_led_alarm)
-        led_thread.start()
+        # 控制LED（定时器自动熄灭，无需单独线程）
+        control_led_alarm()
 
 
 # 使用示例
@@ -588,9 +1223,24 @@ if __name__ == "__main__":
     # 初始化GPIO控制器
     gpio_controller = GPIOController(led_pin=16, buzzer_pin=18)
     
+    # 优先使用 NCNN 模型（export_int8.py 生成INT8模型，仅在支持点积指令的CPU上使用）
+    if os.path.exists("yolov8n_ncnn_int8_model") and cpu_supports_int8_dot():
+        model_path = "yolov8n_ncnn_int8_model"
+        print("✓ 使用 NCNN INT8 量化模型（SDOT/UDOT 加速）")
+    elif os.path.exists("yolov8n_ncnn_model"):
+        model_path = "yolov8n_ncnn_model"
+        print("✓ 使用 NCNN 格式模型（ARM架构优化）")
+    elif os.path.exists("yolov8n.onnx"):
+        # yolo export model=yolov8n.pt format=onnx imgsz=320
+        model_path = "yolov8n.onnx"
+        print("✓ 使用 ONNX 格式模型（ONNX Runtime 图优化）")
+    else:
+        model_path = "yolov8n.pt"
+        print("⚠️ NCNN模型不可用，使用 PyTorch 模型（性能可能受限）")
+    
     # 创建检测器
     detector = ZoneDetector(
-        model_path="yolov8n.pt",
+        model_path=model_path,
         frame_skip=3,
         input_size=(320, 320),
         alert_cooldown=3.0
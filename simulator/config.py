@@ -12,6 +12,7 @@ DEVICE_ID = "device_001"
 SENSOR_INTERVAL = 3      # 传感器数据上报间隔
 DETECTION_INTERVAL = 5   # 检测数据上报间隔
 STATUS_CHECK_INTERVAL = 2  # 状态检查间隔
+STATUS_MAX_INTERVAL = 8    # 状态长时间不变时的最长检查间隔（也是空闲后收到控制指令的最大延迟）
 
 # 模拟参数
 DANGER_ZONE_PROBABILITY = 0.1  # 10%概率模拟危险区域入侵
@@ -55,10 +55,13 @@ class ConveyorSimulator:
         self.generate_interval = 2.5
         self.last_generate_time = 0
         self.max_items = 8
+        
+        self._state_cache: Optional[dict] = None   # get_state() 结果缓存，状态变化时清空
     
     def set_running(self, running: bool):
         """设置运行状态"""
         self.is_running = running
+        self._state_cache = None
         if running:
             self.last_generate_time = time.time()
     
@@ -66,6 +69,7 @@ class ConveyorSimulator:
         """设置产品模式"""
         if mode in self.PRODUCT_TYPES:
             self.product_mode = mode
+            self._state_cache = None
     
     def sync_with_status(self, status: str, mode: str):
         """与生产状态同步"""
@@ -75,6 +79,7 @@ class ConveyorSimulator:
             self.set_running(False)
             self.items.clear()
             self.completed_count = 0
+            self._state_cache = None
         elif status == "paused":
             self.set_running(False)
         
@@ -100,6 +105,7 @@ class ConveyorSimulator:
             created_at=time.time()
         )
         self.items.append(item)
+        self._state_cache = None
         return item
     
     def update(self, delta_time: float) -> int:
@@ -114,6 +120,7 @@ class ConveyorSimulator:
         
         current_time = time.time()
         completed = 0
+        self._state_cache = None
         
         # 自动生成物品
         if self.auto_generate:
@@ -127,30 +134,32 @@ class ConveyorSimulator:
         # 更新物品位置
         move_distance = 12 * self.speed * delta_time
         
-        items_to_remove = []
+        # 单次遍历：移动并过滤掉已到达终点的物品
+        kept = []
         for item in self.items:
             item.position += move_distance
             
             if item.position >= 100:
-                items_to_remove.append(item)
-                self.completed_count += 1
                 completed += 1
-        
-        for item in items_to_remove:
-            self.items.remove(item)
+            else:
+                kept.append(item)
+        self.items = kept
+        self.completed_count += completed
         
         return completed
     
     def get_state(self) -> dict:
-        """获取完整状态"""
-        return {
-            "is_running": self.is_running,
-            "speed": self.speed,
-            "product_mode": self.product_mode,
-            "items": [item.to_dict() for item in self.items],
-            "completed_count": self.completed_count,
-            "auto_generate": self.auto_generate
-        }
+        """获取完整状态（停止/暂停期间状态不变，直接返回缓存）"""
+        if self._state_cache is None:
+            self._state_cache = {
+                "is_running": self.is_running,
+                "speed": self.speed,
+                "product_mode": self.product_mode,
+                "items": [item.to_dict() for item in self.items],
+                "completed_count": self.completed_count,
+                "auto_generate": self.auto_generate
+            }
+        return self._state_cache
 
 
 if __name__ == "__main__":
@@ -11,6 +11,10 @@ from config import DANGER_ZONE_PROBABILITY
 class DetectionSimulator:
     """检测模拟器 - 模拟YOLOv8人员检测"""
     
+    # 人数分布 (0-3人)，预先累加权重，避免 random.choices 每次重新累加
+    PERSON_COUNTS = (0, 1, 2, 3)
+    PERSON_CUM_WEIGHTS = (0.3, 0.7, 0.9, 1.0)  # 对应权重 0.3/0.4/0.2/0.1，大部分时间0-1人
+    
     def __init__(self):
         self._last_detection = None
         self._consecutive_danger = 0  # 连续危险次数
@@ -29,8 +33,8 @@ class DetectionSimulator:
         """
         # 随机生成检测到的人数 (0-3人)
         person_count = random.choices(
-            [0, 1, 2, 3],
-            weights=[0.3, 0.4, 0.2, 0.1]  # 大部分时间0-1人
+            self.PERSON_COUNTS,
+            cum_weights=self.PERSON_CUM_WEIGHTS
         )[0]
         
         # 判断是否在危险区域
@@ -2,8 +2,33 @@
 设备客户端 - 与后端服务器通信
 这个文件和树莓派上使用的完全一样
 """
+import json
 import aiohttp
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+
+# 尝试导入 orjson（序列化更快，未安装时使用标准库 json）
+ORJSON_AVAILABLE = False
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    pass
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+def _dumps(obj: Any) -> bytes:
+    """序列化为JSON字节串"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data: bytes) -> Any:
+    """解析JSON字节串"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 class DeviceClient:
@@ -25,11 +50,15 @@ class DeviceClient:
         self.server_url = server_url.rstrip('/')
         self.device_id = device_id
         self._session: Optional[aiohttp.ClientSession] = None
+        self._timeout = aiohttp.ClientTimeout(total=5, connect=2)  # 所有请求共用
+        self._status_etag: Optional[str] = None                    # 上次状态响应的 ETag
+        self._status_cache: Optional[Dict[str, Any]] = None
     
     async def _get_session(self) -> aiohttp.ClientSession:
-        """获取HTTP会话"""
+        """获取HTTP会话（长连接复用，连接数限制与设备端上报频率匹配）"""
         if self._session is None or self._session.closed:
-            self._session = aiohttp.ClientSession()
+            connector = aiohttp.TCPConnector(limit=4, limit_per_host=4, keepalive_timeout=60)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._timeout)
         return self._session
     
     async def close(self):
@@ -86,6 +115,23 @@ class DeviceClient:
         
         return await self._post("/api/sensor", data)
     
+    async def report_sensor_batch(self, readings: List[Dict[str, Any]]) -> bool:
+        """
+        批量上报传感器数据（一次请求上报多种传感器）
+        
+        Args:
+            readings: [{"sensor_type": str, "value": float, "unit": str}, ...]
+        
+        Returns:
+            是否上报成功
+        """
+        data = {
+            "device_id": self.device_id,
+            "readings": readings
+        }
+        
+        return await self._post("/api/sensor/batch", data)
+    
     async def report_temperature(self, value: float) -> bool:
         """上报温度"""
         return await self.report_sensor("temperature", value, "°C")
@@ -112,7 +158,22 @@ class DeviceClient:
                 "production_count": int
             }
         """
-        return await self._get(f"/api/status/{self.device_id}")
+        # 带上次的 ETag 请求，状态未变化时服务器返回 304，直接复用上次解析的结果
+        endpoint = f"/api/status/{self.device_id}"
+        headers = {"If-None-Match": self._status_etag} if self._status_etag else None
+        try:
+            session = await self._get_session()
+            async with session.get(f"{self.server_url}{endpoint}", headers=headers) as resp:
+                if resp.status == 304:
+                    return self._status_cache
+                if resp.status == 200:
+                    self._status_cache = _loads(await resp.read())
+                    self._status_etag = resp.headers.get("ETag")
+                    return self._status_cache
+                return None
+        except Exception as e:
+            print(f"GET {endpoint} 失败: {e}")
+            return None
     
     async def update_production_count(self, count: int) -> bool:
         """更新生产计数"""
@@ -127,8 +188,8 @@ class DeviceClient:
             session = await self._get_session()
             async with session.post(
                 f"{self.server_url}{endpoint}",
-                json=data,
-                timeout=aiohttp.ClientTimeout(total=5)
+                data=_dumps(data),
+                headers=_JSON_HEADERS
             ) as resp:
                 return resp.status == 200
         except Exception as e:
@@ -140,11 +201,10 @@ class DeviceClient:
         try:
             session = await self._get_session()
             async with session.get(
-                f"{self.server_url}{endpoint}",
-                timeout=aiohttp.ClientTimeout(total=5)
+                f"{self.server_url}{endpoint}"
             ) as resp:
                 if resp.status == 200:
-                    return await resp.json()
+                    return _loads(await resp.read())
                 return None
         except Exception as e:
             print(f"GET {endpoint} 失败: {e}")
@@ -156,8 +216,8 @@ class DeviceClient:
             session = await self._get_session()
             async with session.put(
                 f"{self.server_url}{endpoint}",
-                json=data,
-                timeout=aiohttp.ClientTimeout(total=5)
+                data=_dumps(data),
+                headers=_JSON_HEADERS
             ) as resp:
                 return resp.status == 200
         except Exception as e:
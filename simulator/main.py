@@ -21,7 +21,7 @@ import random
 
 from config import (
     SERVER_URL, DEVICE_ID,
-    SENSOR_INTERVAL, STATUS_CHECK_INTERVAL,
+    SENSOR_INTERVAL, STATUS_CHECK_INTERVAL, STATUS_MAX_INTERVAL,
     PRODUCTION_INCREMENT
 )
 from sensor_simulator import SensorSimulator
@@ -52,6 +52,7 @@ class DeviceSimulator:
         
         # 运行控制
         self.running = False
+        self._stop_event = asyncio.Event()  # stop() 时置位，唤醒正在休眠的循环
     
     async def start(self):
         """启动模拟器"""
@@ -75,20 +76,35 @@ class DeviceSimulator:
         tasks = [
             asyncio.create_task(self._sensor_loop()),
             asyncio.create_task(self._status_loop()),
-            asyncio.create_task(self._sync_production_count()),
         ]
         
         try:
-            await asyncio.gather(*tasks)
+            # 任一循环异常退出时立即结束，不让其余循环在后台继续运行
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    print(f"❌ 任务异常退出: {task.exception()!r}")
         except asyncio.CancelledError:
             pass
         finally:
+            # 取消并等待所有循环结束后再关闭会话，避免请求进行中会话被关闭
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
             await self.client.close()
             print("\n✓ 模拟器已停止")
     
     def stop(self):
-        """停止模拟器"""
+        """停止模拟器（在事件循环线程中调用，正在休眠的循环立即醒来退出）"""
         self.running = False
+        self._stop_event.set()
+    
+    async def _sleep(self, seconds: float):
+        """可被 stop() 打断的休眠"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
     
     async def _sensor_loop(self):
         """传感器数据采集和上报循环"""
@@ -96,31 +112,43 @@ class DeviceSimulator:
             try:
                 data = self.sensor.read_all()
                 
-                for sensor_type, reading in data.items():
-                    success = await self.client.report_sensor(
-                        sensor_type, 
-                        reading["value"], 
-                        reading["unit"]
-                    )
-                    
-                    if success:
-                        print(f"📊 {sensor_type}: {reading['value']}{reading['unit']}")
+                # 所有传感器读数一次请求上报
+                readings = [
+                    {"sensor_type": sensor_type, "value": reading["value"], "unit": reading["unit"]}
+                    for sensor_type, reading in data.items()
+                ]
+                if await self.client.report_sensor_batch(readings):
+                    print("📊 " + " | ".join(
+                        f"{sensor_type}: {reading['value']}{reading['unit']}"
+                        for sensor_type, reading in data.items()))
                 
             except Exception as e:
                 print(f"❌ 传感器上报错误: {e}")
             
-            await asyncio.sleep(SENSOR_INTERVAL)
+            await self._sleep(SENSOR_INTERVAL)
     
     async def _status_loop(self):
-        """状态检查循环 - 接收控制指令"""
+        """
+        状态检查循环 - 接收控制指令，同步生产计数（从服务器获取，避免重复计算）
+        状态连续不变时轮询间隔逐次翻倍（最长 STATUS_MAX_INTERVAL），一旦变化立即恢复
+        """
+        last_status = None
+        interval = STATUS_CHECK_INTERVAL
         while self.running:
             try:
                 server_status = await self.client.get_status()
                 
+                if server_status and server_status == last_status:
+                    interval = min(interval * 2, STATUS_MAX_INTERVAL)
+                else:
+                    interval = STATUS_CHECK_INTERVAL
+                    last_status = server_status
+                
                 if server_status:
                     old_status = self.status
                     self.status = server_status.get("status", "stopped")
                     self.mode = server_status.get("mode", "product_a")
+                    self.production_count = server_status.get("production_count", 0)
                     
                     # 更新传感器状态（传送带由后端管理）
                     self.sensor.set_running(self.status == "running")
@@ -129,32 +157,29 @@ class DeviceSimulator:
                         print(f"📢 状态变更: {old_status} -> {self.status}")
                 
             except Exception as e:
-                pass
+                # 网络错误已在 DeviceClient 内处理，这里只会是响应内容异常
+                print(f"❌ 状态检查错误: {e}")
+                interval = STATUS_CHECK_INTERVAL
             
-            await asyncio.sleep(STATUS_CHECK_INTERVAL)
-    
-    async def _sync_production_count(self):
-        """同步生产计数（从服务器获取，避免重复计算）"""
-        while self.running:
-            try:
-                server_status = await self.client.get_status()
-                if server_status:
-                    self.production_count = server_status.get("production_count", 0)
-            except Exception as e:
-                pass
-            
-            await asyncio.sleep(STATUS_CHECK_INTERVAL * 2)
+            await self._sleep(interval)
 
 
 async def main():
     """主函数"""
     simulator = DeviceSimulator()
     
-    def signal_handler(sig, frame):
+    def signal_handler():
         print("\n\n收到停止信号...")
         simulator.stop()
     
-    signal.signal(signal.SIGINT, signal_handler)
+    loop = asyncio.get_running_loop()
+    try:
+        # 信号在事件循环中处理，可以直接取消任务
+        loop.add_signal_handler(signal.SIGINT, signal_handler)
+        loop.add_signal_handler(signal.SIGTERM, signal_handler)
+    except NotImplementedError:
+        # Windows 不支持 add_signal_handler，转交事件循环线程执行
+        signal.signal(signal.SIGINT, lambda sig, frame: loop.call_soon_threadsafe(signal_handler))
     
     await simulator.start()
 
@@ -4,7 +4,7 @@
 """
 import math
 import random
-from datetime import datetime
+import time
 from typing import Dict, Any
 
 from config import (
@@ -16,9 +16,11 @@ from config import (
 class SensorSimulator:
     """传感器模拟器 - 模拟各类传感器数据"""
     
+    TEMP_OMEGA = 2 * math.pi / 60  # 温度波动角频率：每分钟一个周期
+    
     def __init__(self):
         self.is_running = False  # 设备运行状态
-        self._start_time = datetime.now()
+        self._start_time = time.monotonic()
     
     def set_running(self, running: bool):
         """设置设备运行状态（影响传感器读数）"""
@@ -33,11 +35,10 @@ class SensorSimulator:
             {"value": float, "unit": str}
         """
         # 时间因子：模拟周期性波动
-        elapsed = (datetime.now() - self._start_time).total_seconds()
-        time_factor = elapsed / 60  # 每分钟一个周期
+        elapsed = time.monotonic() - self._start_time
         
         # 正弦波动 + 随机噪声
-        wave = TEMP_WAVE_AMPLITUDE * math.sin(time_factor)
+        wave = TEMP_WAVE_AMPLITUDE * math.sin(self.TEMP_OMEGA * elapsed)
         noise = random.uniform(-TEMP_NOISE_RANGE, TEMP_NOISE_RANGE)
         
         # 运行状态影响温度